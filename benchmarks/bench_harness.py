@@ -0,0 +1,304 @@
+"""Throughput benchmarks for the ClockCheck harness against mock backends.
+
+Starts local stand-ins for the TTS and ASR servers (see mock_servers.py),
+then drives `models.run_ds`, `transcribers.run_ds` and the full harness
+across concurrency settings and dataset sizes. Each case runs in a fresh
+process so peak RSS is per case. Reports items/sec, p50/p99 request
+latency, peak RSS and event-loop lag.
+
+    uv run python benchmarks/bench_harness.py --sizes 100 1440 --concurrency 1 8 32
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from mock_servers import MockServer, MockSettings, synth_wav  # noqa: E402
+
+HARNESS = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "src", "clockcheck", "harness.py"
+)
+
+
+def time_rows(n: int) -> list[dict]:
+    """The first `n` rows of the time-simple prompt set."""
+    rows = []
+    for i in range(n):
+        hour, minute = (i // 60) % 24, i % 60
+        period = "AM" if hour < 12 else "PM"
+        normalized_hour = hour % 12 or 12
+        time_string = f"{normalized_hour}:{minute:02d} {period}"
+        rows.append(
+            {
+                "time_string": time_string,
+                "hour": hour,
+                "minute": minute,
+                "period": period,
+                "text": f"The time is {time_string}.",
+            }
+        )
+    return rows
+
+
+class LoopLagMonitor:
+    """Samples how late the event loop wakes up from a short sleep."""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.lags: list[float] = []
+        self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            start = loop.time()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(loop.time() - start - self.interval, 0.0))
+
+    def __enter__(self):
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    def __exit__(self, *exc):
+        self._task.cancel()
+
+
+class Timed:
+    """Wraps a TTSModel or Transcriber and records per-request latency."""
+
+    def __init__(self, inner):
+        self.inner = inner
+        self.latencies: list[float] = []
+
+    async def _timed(self, fn, *args):
+        start = time.perf_counter()
+        try:
+            return await fn(*args)
+        finally:
+            self.latencies.append(time.perf_counter() - start)
+
+    async def generate(self, text):
+        return await self._timed(self.inner.generate, text)
+
+    async def transcribe(self, audio):
+        return await self._timed(self.inner.transcribe, audio)
+
+    @property
+    def upload_sample_rate(self):
+        return getattr(self.inner, "upload_sample_rate", None)
+
+    def slot(self):
+        return self.inner.slot()
+
+    async def encode(self, audio):
+        return await self.inner.encode(audio)
+
+    async def transcribe_upload(self, payload):
+        return await self._timed(self.inner.transcribe_upload, payload)
+
+
+def _percentiles(values: list[float]) -> dict:
+    if not values:
+        return {"p50_ms": None, "p99_ms": None}
+    arr = np.asarray(values) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(arr, 50)), 2),
+        "p99_ms": round(float(np.percentile(arr, 99)), 2),
+    }
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale / 1e6
+
+
+def run_stage_case(stage: str, n: int, concurrency: int, urls: dict) -> dict:
+    """Run one in-process stage benchmark. Executed in a child process."""
+    from datasets import Dataset
+
+    import clockcheck.models as models
+    import clockcheck.transcribers as transcribers
+    from clockcheck.models.openai_tts import OpenAITTSModel
+    from clockcheck.transcribers.openai_asr import OpenAITranscriber
+    from clockcheck.transcribers.whisper_cpp import WhisperCppTranscriber
+    from clockcheck.utils.audio import decode
+    from clockcheck.utils.config import ModelConfig, TranscriptionConfig
+
+    rows = time_rows(n)
+    if stage == "tts":
+        config = ModelConfig(
+            model_type="openai",
+            model_id="mock",
+            voice="mock",
+            requests_per_minute=10**7,
+            max_concurrency=concurrency,
+        )
+        client = Timed(OpenAITTSModel(api_key="mock", endpoint=f"{urls['tts']}/v1"))
+        ds = Dataset.from_list(rows)
+        run = lambda: models.run_ds(ds, client, config)  # noqa: E731
+    else:
+        config = TranscriptionConfig(
+            model_type="whisper-cpp" if stage == "asr-whisper" else "openai",
+            model_id="mock",
+            requests_per_second=10**6,
+            max_concurrency=concurrency,
+        )
+        if stage == "asr-whisper":
+            inner = WhisperCppTranscriber(endpoint=urls["whisper"])
+        else:
+            inner = OpenAITranscriber(api_key="mock", endpoint=f"{urls['asr']}/v1")
+        client = Timed(inner)
+        audio = decode(synth_wav(rows[0]["text"], MockSettings()))
+        ds = Dataset.from_list([{**row, "audio": audio} for row in rows])
+        run = lambda: transcribers.run_ds(ds, client, config)  # noqa: E731
+
+    async def main():
+        with LoopLagMonitor() as monitor:
+            start = time.perf_counter()
+            out = await run()
+            wall = time.perf_counter() - start
+        return out, wall, monitor.lags
+
+    out, wall, lags = asyncio.run(main())
+    return {
+        "case": stage,
+        "rows": n,
+        "concurrency": concurrency,
+        "completed": len(out),
+        "wall_s": round(wall, 3),
+        "items_per_s": round(len(out) / wall, 2),
+        **_percentiles(client.latencies),
+        "peak_rss_mb": round(_peak_rss_mb(), 1),
+        "loop_lag_p99_ms": _percentiles(lags)["p99_ms"],
+        "loop_lag_max_ms": round(max(lags, default=0.0) * 1000, 2),
+    }
+
+
+def run_harness_case(
+    pipeline: str, n: int, concurrency: int, urls: dict, tts: MockServer
+) -> dict:
+    """Run harness.py end to end in a subprocess against the mock servers."""
+    from datasets import Dataset, load_from_disk
+
+    with tempfile.TemporaryDirectory() as tmp:
+        dataset_path = os.path.join(tmp, "prompts")
+        Dataset.from_list(time_rows(n)).save_to_disk(dataset_path)
+        config_path = os.path.join(tmp, "config.toml")
+        with open(config_path, "w") as f:
+            f.write(
+                f'dataset_path = "{dataset_path}"\n'
+                f'output_dataset_path = "{os.path.join(tmp, "out")}"\n'
+                f'pipeline = "{pipeline}"\n'
+                f"queue_size = {concurrency}\n\n"
+                "[model]\n"
+                'model_type = "openai"\n'
+                f'base_url = "{urls["tts"]}/v1"\n'
+                'model_id = "mock"\nvoice = "mock"\n'
+                "requests_per_minute = 10000000\n"
+                f"max_concurrency = {concurrency}\n\n"
+                "[transcriber]\n"
+                'model_type = "whisper-cpp"\n'
+                f'base_url = "{urls["whisper"]}"\n'
+                'model_id = "mock"\n'
+                "requests_per_second = 1000000\n"
+                f"max_concurrency = {concurrency}\n"
+            )
+        env = {**os.environ, "OPENAI_API_KEY": "mock"}
+        n_before = len(tts.settings.latencies)
+        # stderr goes to a file: nothing reads a pipe while wait4 blocks, so
+        # a chatty child would fill it and hang
+        with open(os.path.join(tmp, "stderr.log"), "w+b") as stderr:
+            start = time.perf_counter()
+            proc = subprocess.Popen(
+                [sys.executable, HARNESS, "--config", config_path],
+                env=env,
+                stdout=subprocess.DEVNULL,
+                stderr=stderr,
+            )
+            _, status, usage = os.wait4(proc.pid, 0)
+            wall = time.perf_counter() - start
+            if status != 0:
+                stderr.seek(0)
+                raise RuntimeError(f"harness failed:\n{stderr.read().decode()[-2000:]}")
+        # Rows that failed every attempt are left out of the saved dataset
+        completed = len(load_from_disk(os.path.join(tmp, "out")))
+
+    scale = 1 if sys.platform == "darwin" else 1024
+    return {
+        "case": f"harness-{pipeline}",
+        "rows": n,
+        "concurrency": concurrency,
+        "completed": completed,
+        "wall_s": round(wall, 3),
+        "items_per_s": round(completed / wall, 2),
+        # Server-side TTS handling time; the client runs in another process
+        **_percentiles(tts.settings.latencies[n_before:]),
+        "peak_rss_mb": round(usage.ru_maxrss * scale / 1e6, 1),
+        "loop_lag_p99_ms": None,
+        "loop_lag_max_ms": None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1440])
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument(
+        "--cases",
+        nargs="+",
+        default=[
+            "tts",
+            "asr-whisper",
+            "asr-openai",
+            "harness-staged",
+            "harness-streaming",
+        ],
+    )
+    parser.add_argument("--latency", type=float, default=0.05, help="Mock latency (s)")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--json", help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    mock = lambda: MockSettings(latency_s=args.latency, error_rate=args.error_rate)  # noqa: E731
+    results = []
+    with (
+        MockServer(mock()) as tts,
+        MockServer(mock()) as asr,
+        MockServer(mock()) as whisper,
+    ):
+        urls = {"tts": tts.url, "asr": asr.url, "whisper": whisper.url}
+        spawn = get_context("spawn")
+        for case in args.cases:
+            for n in args.sizes:
+                for concurrency in args.concurrency:
+                    if case.startswith("harness-"):
+                        pipeline = case.removeprefix("harness-")
+                        result = run_harness_case(pipeline, n, concurrency, urls, tts)
+                    else:
+                        # A fresh process per case keeps peak RSS meaningful
+                        with ProcessPoolExecutor(1, mp_context=spawn) as pool:
+                            result = pool.submit(
+                                run_stage_case, case, n, concurrency, urls
+                            ).result()
+                    results.append(result)
+                    print(json.dumps(result), flush=True)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Startup-time benchmark for the harness CLI and backend registry.
+
+Times, in fresh interpreters, `harness.py --help`, `harness.py --validate`
+for configs that use different backends, and resolving each registered
+backend on its own. Also records which heavy modules each case imported, to
+show that a config only pays for the backends it uses.
+
+    uv run python benchmarks/bench_startup.py --repeat 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+HARNESS = os.path.join(ROOT, "src", "clockcheck", "harness.py")
+
+HEAVY_MODULES = ["datasets", "openai", "scipy.signal", "soundfile", "torch"]
+
+_REPORT_MODULES = (
+    "import json, sys\n"
+    "print(json.dumps([m for m in {heavy} if m in sys.modules]), file=sys.stderr)\n"
+)
+
+
+def _config(model_type: str, transcriber_type: str) -> str:
+    return (
+        'dataset_path = "unused"\n\n'
+        f'[model]\nmodel_type = "{model_type}"\nmodel_id = "m"\nvoice = "v"\n'
+        'base_url = "http://localhost:1/v1"\n\n'
+        f'[transcriber]\nmodel_type = "{transcriber_type}"\nmodel_id = "m"\n'
+    )
+
+
+def _time(argv: list[str], repeat: int) -> dict:
+    """Median wall time of `argv` over `repeat` fresh runs, plus heavy imports."""
+    env = {**os.environ, "PYTHONPATH": os.path.join(ROOT, "src")}
+    times = []
+    imported: list = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        proc = subprocess.run(argv, env=env, capture_output=True, text=True)
+        times.append(time.perf_counter() - start)
+        if proc.returncode != 0:
+            raise RuntimeError(f"{argv} failed:\n{proc.stderr[-2000:]}")
+        last = proc.stderr.strip().splitlines()[-1:] or ["[]"]
+        try:
+            imported = json.loads(last[0])
+        except json.JSONDecodeError:
+            imported = []
+    return {
+        "median_s": round(statistics.median(times), 3),
+        "min_s": round(min(times), 3),
+        "heavy_imports": imported,
+    }
+
+
+def _python(code: str) -> list[str]:
+    heavy = json.dumps(HEAVY_MODULES)
+    return [sys.executable, "-c", code + "\n" + _REPORT_MODULES.format(heavy=heavy)]
+
+
+def _harness(*args: str) -> list[str]:
+    # Run the harness in-process so the heavy-import report sees its modules
+    code = (
+        "import runpy, sys\n"
+        f"sys.argv = {[HARNESS, *args]!r}\n"
+        "try:\n"
+        f"    runpy.run_path({HARNESS!r}, run_name='__main__')\n"
+        "except SystemExit:\n"
+        "    pass\n"
+    )
+    return _python(code)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="Also write results to this JSON file")
+    args = parser.parse_args()
+
+    from clockcheck.registry import MODELS, TRANSCRIBERS
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        cases = {
+            "python": _python("pass"),
+            "harness --help": _harness("--help"),
+        }
+        for model_type, transcriber_type in [
+            ("openai", "whisper-cpp"),
+            ("openai", "openai"),
+        ]:
+            path = os.path.join(tmp, f"{model_type}-{transcriber_type}.toml")
+            with open(path, "w") as f:
+                f.write(_config(model_type, transcriber_type))
+            cases[f"validate {model_type} + {transcriber_type}"] = _harness(
+                "--config", path, "--validate"
+            )
+        for registry in (MODELS, TRANSCRIBERS):
+            for name in registry.names():
+                cases[f"resolve {registry.kind} {name}"] = _python(
+                    "from clockcheck.registry import MODELS, TRANSCRIBERS\n"
+                    f"{registry.kind.upper()}S.get({name!r})"
+                )
+        cases["resolve every backend"] = _python(
+            "from clockcheck.registry import MODELS, TRANSCRIBERS\n"
+            "for r in (MODELS, TRANSCRIBERS):\n"
+            "    for n in r.names():\n"
+            "        r.get(n)"
+        )
+
+        for case, argv in cases.items():
+            result = {"case": case, **_time(argv, args.repeat)}
+            results.append(result)
+            print(json.dumps(result), flush=True)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
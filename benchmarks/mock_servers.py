@@ -0,0 +1,179 @@
+"""Local stand-ins for the HTTP backends ClockCheck talks to.
+
+- OpenAI-compatible TTS: POST /v1/audio/speech returns a synthetic WAV, or
+  chunked raw PCM for response_format "pcm"
+- OpenAI-compatible ASR: POST /v1/audio/transcriptions returns JSON text
+- whisper.cpp server: POST /inference returns JSON text
+
+Latency and error rate are configurable per server, so harness overhead
+can be measured separately from real model latency and without a network.
+"""
+
+import io
+import json
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import List, Optional
+
+import numpy as np
+import soundfile as sf
+
+TRANSCRIPT = "The time is 12:00 AM."
+
+
+@dataclass
+class MockSettings:
+    latency_s: float = 0.05
+    """
+    Mean per-request latency; actual latency is jittered by +/-20%
+    """
+    error_rate: float = 0.0
+    """
+    Fraction of requests answered with a 429 or 500
+    """
+    serial: bool = False
+    """
+    Handle one request at a time, like whisper-server
+    """
+    seconds_per_char: float = 0.06
+    """
+    Length of synthesized audio per input character
+    """
+    sample_rate: int = 24000
+    latencies: List[float] = field(default_factory=list)
+    """
+    Handling time of every request served, for server-side percentiles
+    """
+
+
+def synth_tone(text: str, settings: MockSettings) -> np.ndarray:
+    """A quiet tone whose length scales with the text."""
+    n = max(int(len(text) * settings.seconds_per_char * settings.sample_rate), 1)
+    t = np.arange(n, dtype=np.float32) / settings.sample_rate
+    return 0.1 * np.sin(2 * np.pi * 220.0 * t)
+
+
+def synth_wav(text: str, settings: MockSettings) -> bytes:
+    """`synth_tone` as 16-bit WAV."""
+    audio = synth_tone(text, settings)
+    with io.BytesIO() as buf:
+        sf.write(buf, audio, settings.sample_rate, format="WAV")
+        return buf.getvalue()
+
+
+def _make_handler(settings: MockSettings, lock: Optional[threading.Lock]):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Headers and body go out in separate writes; without this, Nagle
+        # plus delayed ACKs add ~40ms to every keep-alive response
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status: int, body: bytes, content_type: str):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _send_chunked(self, body: bytes, content_type: str, chunk_size: int):
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i in range(0, len(body), chunk_size):
+                chunk = body[i : i + chunk_size]
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.write(b"0\r\n\r\n")
+
+        def do_GET(self):
+            self._send(200, b"ok", "text/plain")
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            body = self.rfile.read(length)
+            if lock is not None:
+                with lock:
+                    self._handle(body)
+            else:
+                self._handle(body)
+
+        def _handle(self, body: bytes):
+            start = time.perf_counter()
+            time.sleep(settings.latency_s * random.uniform(0.8, 1.2))
+            if random.random() < settings.error_rate:
+                status = random.choice([429, 500])
+                self._send(status, b'{"error": "mock failure"}', "application/json")
+            elif self.path.endswith("/audio/speech"):
+                request = json.loads(body or b"{}")
+                text = request.get("input", "")
+                if request.get("response_format") == "pcm":
+                    # Raw 16-bit PCM, streamed in 100ms chunks
+                    pcm = (synth_tone(text, settings) * 32767).astype("<i2").tobytes()
+                    self._send_chunked(pcm, "audio/pcm", settings.sample_rate // 5)
+                else:
+                    self._send(200, synth_wav(text, settings), "audio/wav")
+            elif (
+                self.path.endswith("/audio/transcriptions") or self.path == "/inference"
+            ):
+                payload = json.dumps({"text": TRANSCRIPT}).encode()
+                self._send(200, payload, "application/json")
+            else:
+                self._send(404, b"{}", "application/json")
+            settings.latencies.append(time.perf_counter() - start)
+
+    return Handler
+
+
+class MockServer:
+    """A mock backend running on a background thread.
+
+    Usage:
+        with MockServer(MockSettings(latency_s=0.1)) as server:
+            ...  # point a client at server.url
+    """
+
+    def __init__(self, settings: Optional[MockSettings] = None, port: int = 0):
+        self.settings = settings or MockSettings()
+        lock = threading.Lock() if self.settings.serial else None
+        self.httpd = ThreadingHTTPServer(
+            ("127.0.0.1", port), _make_handler(self.settings, lock)
+        )
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def __enter__(self) -> "MockServer":
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run a mock ClockCheck backend")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--serial", action="store_true")
+    args = parser.parse_args()
+
+    settings = MockSettings(
+        latency_s=args.latency, error_rate=args.error_rate, serial=args.serial
+    )
+    with MockServer(settings, port=args.port) as server:
+        print(f"Mock server listening on {server.url}")
+        server.thread.join()
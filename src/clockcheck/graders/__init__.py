@@ -0,0 +1,205 @@
+import jiwer
+import numpy as np
+from datasets import Dataset
+from typing import Dict, List, Optional
+
+from clockcheck.graders.time_parser import SpokenTime, extract_time
+
+ERROR_CLASSES = [
+    "failed_prefix",
+    "no_time",
+    "false_negative",
+    "wrong_time",
+    "bad_audio",
+]
+"""
+Error taxonomy for rows whose WER is over the threshold:
+
+- bad_audio: the clip was rejected by `clockcheck.prefilter` and never
+  transcribed; 'audio_reject_reason' says why
+- failed_prefix: the text before the time in the ground truth is missing
+- no_time: no time of day could be found after the prefix
+- false_negative: the right time was said, just not in the expected form
+- wrong_time: a different time was said
+"""
+
+GRADE_COLUMNS = ["ground_truth", "transcribed_text", "hour", "minute"]
+
+OPTIONAL_COLUMNS = ["text", "time_string", "audio_reject_reason"]
+"""Columns `grade_batch` uses when present."""
+
+
+def _word_errors(references: List[str], hypotheses: List[str]) -> np.ndarray:
+    """Word-level edit distance for each (reference, hypothesis) pair."""
+    errors = np.zeros(len(references), dtype=np.int64)
+    # jiwer rejects empty strings; an empty hypothesis is all deletions
+    nonempty = [i for i, hyp in enumerate(hypotheses) if hyp.strip()]
+    for i in set(range(len(references))) - set(nonempty):
+        errors[i] = len(references[i].split())
+    if not nonempty:
+        return errors
+    output = jiwer.process_words(
+        [references[i] for i in nonempty], [hypotheses[i] for i in nonempty]
+    )
+    for i, chunks in zip(nonempty, output.alignments):
+        for chunk in chunks:
+            if chunk.type in ("substitute", "delete"):
+                errors[i] += chunk.ref_end_idx - chunk.ref_start_idx
+            elif chunk.type == "insert":
+                errors[i] += chunk.hyp_end_idx - chunk.hyp_start_idx
+    return errors
+
+
+def _classify(
+    ground_truth: str,
+    transcribed: str,
+    hour: int,
+    minute: int,
+    time_string: Optional[str],
+) -> tuple[Optional[str], Optional[SpokenTime]]:
+    # The prefix is whatever the ground truth says before the time, e.g.
+    # "The time is"; without a time_string there's nothing to check
+    prefix = ""
+    if time_string and time_string in ground_truth:
+        prefix = ground_truth.split(time_string)[0].strip()
+
+    if prefix and prefix.lower() not in transcribed.lower():
+        return "failed_prefix", extract_time(transcribed)
+    rest = transcribed[transcribed.lower().find(prefix.lower()) + len(prefix) :]
+    found = extract_time(rest)
+    if found is None:
+        return "no_time", None
+    if found.hour % 12 == hour % 12 and found.minute == minute:
+        return "false_negative", found
+    return "wrong_time", found
+
+
+def grade_batch(batch: Dict[str, list], wer_threshold: float = 0.1) -> Dict[str, list]:
+    """Grade a batch of rows.
+
+    Args:
+        batch: Columns 'ground_truth' (or 'text'), 'transcribed_text',
+            'hour' and 'minute', and optionally 'time_string' and
+            'audio_reject_reason'.
+        wer_threshold: Rows with WER above this are classified into
+            `ERROR_CLASSES`; the rest pass.
+
+    Returns:
+        Columns 'wer', 'word_errors', 'ref_words', 'time_correct' and
+        'error' (None for passing rows).
+    """
+    references = batch.get("ground_truth") or batch["text"]
+    hypotheses = [t or "" for t in batch["transcribed_text"]]
+    time_strings = batch.get("time_string") or [None] * len(references)
+    rejected = batch.get("audio_reject_reason") or [None] * len(references)
+
+    errors = _word_errors(references, hypotheses)
+    ref_words = np.array([max(len(r.split()), 1) for r in references])
+    wer = errors / ref_words
+
+    classes: List[Optional[str]] = []
+    time_correct: List[bool] = []
+    for i in range(len(references)):
+        error, found = _classify(
+            references[i],
+            hypotheses[i],
+            batch["hour"][i],
+            batch["minute"][i],
+            time_strings[i],
+        )
+        time_correct.append(
+            found is not None
+            and found.hour % 12 == batch["hour"][i] % 12
+            and found.minute == batch["minute"][i]
+        )
+        if rejected[i]:
+            classes.append("bad_audio")
+        else:
+            classes.append(error if wer[i] > wer_threshold else None)
+
+    return {
+        "wer": wer.tolist(),
+        "word_errors": errors.tolist(),
+        "ref_words": ref_words.tolist(),
+        "time_correct": time_correct,
+        "error": classes,
+    }
+
+
+def summarize(grades: Dict[str, list]) -> dict:
+    """Summary statistics over the columns produced by `grade_batch`."""
+    wer = np.asarray(grades["wer"], dtype=np.float64)
+    n = len(wer)
+    if n == 0:
+        return {"rows": 0}
+    errors = np.asarray(grades["error"], dtype=object)
+    counts = {c: int(np.sum(errors == c)) for c in ERROR_CLASSES}
+    return {
+        "rows": n,
+        "mean_wer": float(wer.mean()),
+        "corpus_wer": float(
+            np.sum(grades["word_errors"]) / max(np.sum(grades["ref_words"]), 1)
+        ),
+        "median_wer": float(np.median(wer)),
+        "failed": int(sum(counts.values())),
+        "failure_rate": float(sum(counts.values()) / n),
+        "time_accuracy": float(np.mean(grades["time_correct"])),
+        "errors": counts,
+    }
+
+
+def summarize_by(ds: Dataset, column: str) -> Dict[str, dict]:
+    """`summarize` separately for each value of `column` in a graded dataset."""
+    wanted = [column, "wer", "word_errors", "ref_words", "time_correct", "error"]
+    df = ds.select_columns(wanted).to_pandas()
+    return {
+        str(key): summarize({name: group[name].tolist() for name in wanted[1:]})
+        for key, group in df.groupby(column, sort=True)
+    }
+
+
+def grade_ds(
+    ds: Dataset, wer_threshold: float = 0.1, batch_size: int = 1000
+) -> tuple[Dataset, dict]:
+    """Grade a predictions dataset in batches.
+
+    Only the text and time columns are read, so the audio column is never
+    decoded. The ground truth is the 'ground_truth' column if present,
+    otherwise the TTS input 'text'.
+
+    Args:
+        ds: Dataset with 'transcribed_text', 'hour', 'minute' and
+            'ground_truth' or 'text'.
+        wer_threshold: WER above which a row counts as failed.
+        batch_size: Rows graded per batch.
+
+    Returns:
+        The dataset with grade columns added, and summary statistics.
+    """
+    wanted = GRADE_COLUMNS + OPTIONAL_COLUMNS
+    columns = [c for c in wanted if c in ds.column_names]
+    grades: Dict[str, list] = {}
+    for batch in ds.select_columns(columns).iter(batch_size=batch_size):
+        for name, values in grade_batch(batch, wer_threshold).items():
+            grades.setdefault(name, []).extend(values)
+
+    if not grades:
+        return ds, summarize({"wer": []})
+    for name, values in grades.items():
+        if name in ds.column_names:
+            ds = ds.remove_columns(name)
+        ds = ds.add_column(name, values)
+    return ds, summarize(grades)
+
+
+__all__ = [
+    "ERROR_CLASSES",
+    "GRADE_COLUMNS",
+    "OPTIONAL_COLUMNS",
+    "SpokenTime",
+    "extract_time",
+    "grade_batch",
+    "grade_ds",
+    "summarize",
+    "summarize_by",
+]
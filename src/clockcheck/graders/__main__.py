@@ -0,0 +1,31 @@
+import argparse
+import json
+from datasets import load_from_disk
+
+from clockcheck.graders import grade_ds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Grade a saved predictions dataset")
+    parser.add_argument("dataset_path", help="Dataset saved by the harness")
+    parser.add_argument(
+        "--wer-threshold",
+        type=float,
+        default=0.1,
+        help="WER above which a row counts as failed (default: 0.1)",
+    )
+    parser.add_argument(
+        "--save", action="store_true", help="Save the graded dataset next to the input"
+    )
+    args = parser.parse_args()
+
+    ds, summary = grade_ds(load_from_disk(args.dataset_path), args.wer_threshold)
+    print(json.dumps(summary, indent=2))
+    if args.save:
+        out_path = args.dataset_path.rstrip("/") + "_graded"
+        ds.save_to_disk(out_path)
+        print(f"Saved to {out_path}")
+
+
+if __name__ == "__main__":
+    main()
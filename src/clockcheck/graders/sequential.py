@@ -0,0 +1,184 @@
+import math
+import random
+from collections import defaultdict
+from statistics import NormalDist
+from typing import Dict, Iterable, Iterator, List
+
+from datasets import Dataset
+
+from clockcheck.graders import (
+    ERROR_CLASSES,
+    GRADE_COLUMNS,
+    OPTIONAL_COLUMNS,
+    grade_batch,
+)
+
+
+def _balanced_grid(hours: List[int], minutes: List[int]) -> Iterator[tuple]:
+    """Visit every (hour, minute) pair so any prefix is spread evenly.
+
+    Pair k is (hours[k % 24], minutes[(k + k // 120) % 60]): every 24
+    consecutive pairs cover each hour (and so both AM and PM) once, every
+    60 cover each minute once, and the k // 120 offset steps through the
+    residues mod 12 that plain (k % 24, k % 60) would never reach.
+    """
+    for k in range(len(hours) * len(minutes)):
+        yield hours[k % 24], minutes[(k + k // 120) % 60]
+
+
+def stratified_order(ds: Dataset, seed: int = 0) -> List[int]:
+    """Row indices of `ds` in an order balanced over hour, minute and AM/PM.
+
+    Rows are grouped by their (hour, minute) stratum. Strata are visited in
+    a seeded, balanced order, taking one random row from each per pass, so
+    the first n rows of the order are close to a stratified sample of size
+    n for every n. Datasets without 'hour'/'minute' get a seeded shuffle.
+    """
+    rng = random.Random(seed)
+    if not {"hour", "minute"} <= set(ds.column_names):
+        order = list(range(len(ds)))
+        rng.shuffle(order)
+        return order
+
+    strata: Dict[tuple, List[int]] = defaultdict(list)
+    columns = ds.select_columns(["hour", "minute"]).to_dict()
+    for i, key in enumerate(zip(columns["hour"], columns["minute"])):
+        strata[key].append(i)
+    for rows in strata.values():
+        rng.shuffle(rows)
+
+    hours, minutes = list(range(24)), list(range(60))
+    rng.shuffle(hours)
+    rng.shuffle(minutes)
+    grid = [key for key in _balanced_grid(hours, minutes) if key in strata]
+    # Anything off the 24x60 grid goes last, in random order
+    on_grid = set(grid)
+    extra = [key for key in strata if key not in on_grid]
+    rng.shuffle(extra)
+    keys = grid + extra
+
+    order: List[int] = []
+    depth = max(len(rows) for rows in strata.values()) if strata else 0
+    for level in range(depth):
+        order.extend(strata[k][level] for k in keys if level < len(strata[k]))
+    return order
+
+
+def wilson_interval(successes: int, n: int, z: float) -> tuple[float, float]:
+    """Wilson score interval for a binomial proportion.
+
+    Unlike the normal approximation it stays inside [0, 1] and doesn't
+    collapse to zero width at 0% or 100%, which matters for good models.
+    """
+    if n == 0:
+        return 0.0, 1.0
+    p = successes / n
+    denominator = 1 + z * z / n
+    center = (p + z * z / (2 * n)) / denominator
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / denominator
+    return max(center - half, 0.0), min(center + half, 1.0)
+
+
+class SequentialStopper:
+    """Grades rows as they finish and decides when the estimate is tight enough.
+
+    Stops once at least `min_rows` rows are graded and the confidence
+    interval on the failure rate, and on each error class's rate, is no
+    wider than `ci_width`. Checking after every row is a sequential test,
+    so the nominal confidence is optimistic; `min_rows` keeps the earliest
+    checks from stopping on a lucky streak.
+    """
+
+    def __init__(
+        self,
+        total: int,
+        ci_width: float = 0.05,
+        confidence: float = 0.95,
+        min_rows: int = 100,
+        wer_threshold: float = 0.1,
+    ):
+        """
+        Args:
+            total: Rows in the full sweep, for the savings report.
+            ci_width: Target full width of every confidence interval.
+            confidence: Two-sided confidence level of the intervals.
+            min_rows: Never stop before this many rows are graded.
+            wer_threshold: WER above which a row counts as failed.
+        """
+        if not 0 < ci_width < 1:
+            raise ValueError("ci_width must be between 0 and 1.")
+        self.total = total
+        self.ci_width = ci_width
+        self.confidence = confidence
+        self.min_rows = min_rows
+        self.wer_threshold = wer_threshold
+        self.z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        self.n = 0
+        self.failed = 0
+        self.counts = {c: 0 for c in ERROR_CLASSES}
+        self.stopped = False
+
+    def observe(self, rows: Iterable[dict]) -> bool:
+        """Grade finished rows and update the stopping decision.
+
+        Returns:
+            Whether enough rows have been seen to stop.
+        """
+        rows = [row for row in rows if row is not None]
+        if rows:
+            wanted = GRADE_COLUMNS + OPTIONAL_COLUMNS
+            columns = [c for c in wanted if c in rows[0]]
+            batch = {c: [row.get(c) for row in rows] for c in columns}
+            errors = grade_batch(batch, self.wer_threshold)["error"]
+            self.n += len(errors)
+            for error in errors:
+                if error is not None:
+                    self.failed += 1
+                    self.counts[error] += 1
+        if not self.stopped and self.n >= self.min_rows:
+            self.stopped = all(
+                high - low <= self.ci_width for low, high in self.intervals().values()
+            )
+        return self.stopped
+
+    def intervals(self) -> Dict[str, tuple[float, float]]:
+        """Confidence intervals on the failure rate and each class's rate."""
+        intervals = {"failure_rate": wilson_interval(self.failed, self.n, self.z)}
+        for name, count in self.counts.items():
+            intervals[name] = wilson_interval(count, self.n, self.z)
+        return intervals
+
+    def gate(self, items: Iterable) -> Iterator:
+        """Yield from `items` until the stopper decides to stop."""
+        for item in items:
+            if self.stopped:
+                return
+            yield item
+
+    def report(self) -> dict:
+        """Estimates with intervals, and requests saved versus the full sweep."""
+        n = max(self.n, 1)
+        estimates = {"failure_rate": self.failed / n}
+        estimates.update({name: count / n for name, count in self.counts.items()})
+        saved = max(self.total - self.n, 0)
+        return {
+            "stopped_early": self.stopped and saved > 0,
+            "rows_graded": self.n,
+            "full_sweep_rows": self.total,
+            # One TTS and one ASR request per row
+            "requests_saved": 2 * saved,
+            "fraction_saved": saved / self.total if self.total else 0.0,
+            "confidence": self.confidence,
+            "ci_width": self.ci_width,
+            "estimates": {
+                name: {
+                    "estimate": estimates[name],
+                    "low": low,
+                    "high": high,
+                }
+                for name, (low, high) in self.intervals().items()
+            },
+        }
+
+
+__all__ = ["SequentialStopper", "stratified_order", "wilson_interval"]
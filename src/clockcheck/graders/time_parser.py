@@ -0,0 +1,198 @@
+import re
+from typing import NamedTuple, Optional
+
+
+class SpokenTime(NamedTuple):
+    hour: int
+    """
+    0-23 if the text was unambiguous (24h clock or an AM/PM marker), else 1-12
+    """
+    minute: int
+    period: Optional[str]
+    """
+    "AM", "PM", or None if the text had no marker
+    """
+
+
+_UNITS = {
+    "zero": 0,
+    "one": 1,
+    "two": 2,
+    "three": 3,
+    "four": 4,
+    "five": 5,
+    "six": 6,
+    "seven": 7,
+    "eight": 8,
+    "nine": 9,
+    "ten": 10,
+    "eleven": 11,
+    "twelve": 12,
+    "thirteen": 13,
+    "fourteen": 14,
+    "fifteen": 15,
+    "sixteen": 16,
+    "seventeen": 17,
+    "eighteen": 18,
+    "nineteen": 19,
+}
+_TENS = {"twenty": 20, "thirty": 30, "forty": 40, "fourty": 40, "fifty": 50}
+_PAST = {"past", "after"}
+_TO = {"to", "till", "til", "before", "of"}
+_SKIP = {"a", "and", "minute", "minutes"}
+_NAMED_HOURS = {"noon": 12, "midday": 12, "midnight": 24}
+_PERIOD_PHRASES = [
+    ("in the morning", "AM"),
+    ("in the afternoon", "PM"),
+    ("in the evening", "PM"),
+    ("at night", "PM"),
+]
+
+_TOKEN_RE = re.compile(r"\d{1,2}:\d{2}|\d+|[a-z]+")
+
+
+def _normalize(text: str) -> str:
+    text = text.lower()
+    text = re.sub(r"\b([ap])\.?\s?m\b\.?", r" \1m ", text)
+    text = re.sub(r"o'?\s?clock", " oclock ", text)
+    for phrase, period in _PERIOD_PHRASES:
+        text = text.replace(phrase, f" {period.lower()} ")
+    # "5.28 pm" is occasionally used for "5:28 pm"
+    text = re.sub(r"\b(\d{1,2})\.(\d{2})\b", r"\1:\2", text)
+    return text.replace("-", " ")
+
+
+def _tokenize(text: str) -> list:
+    """Split into words, with digits and number words folded into ints.
+
+    "1:23" becomes [1, ":", 23]; "twenty three" and "23" both become 23;
+    "oh five" becomes 5.
+    """
+    raw = _TOKEN_RE.findall(_normalize(text))
+    tokens: list = []
+    i = 0
+    while i < len(raw):
+        word = raw[i]
+        nxt = raw[i + 1] if i + 1 < len(raw) else None
+        if ":" in word:
+            hour, minute = word.split(":")
+            tokens += [int(hour), ":", int(minute)]
+        elif word.isdigit():
+            tokens.append(int(word))
+        elif word in _TENS:
+            if nxt in _UNITS and 0 < _UNITS[nxt] < 10:
+                tokens.append(_TENS[word] + _UNITS[nxt])
+                i += 1
+            else:
+                tokens.append(_TENS[word])
+        elif word in ("oh", "o") and nxt in _UNITS and _UNITS[nxt] < 10:
+            tokens.append(("oh", _UNITS[nxt]))
+            i += 1
+        elif word in _UNITS:
+            tokens.append(_UNITS[word])
+        else:
+            tokens.append(word)
+        i += 1
+    return tokens
+
+
+def _is_num(token) -> bool:
+    return isinstance(token, int) or isinstance(token, tuple)
+
+
+def _value(token) -> int:
+    return token[1] if isinstance(token, tuple) else token
+
+
+def _period_at(tokens: list, i: int) -> Optional[str]:
+    if i < len(tokens) and tokens[i] in ("am", "pm"):
+        return tokens[i].upper()
+    return None
+
+
+def _make(hour: int, minute: int, period: Optional[str]) -> Optional[SpokenTime]:
+    if not (0 <= hour <= 24 and 0 <= minute <= 59):
+        return None
+    if period == "PM" and hour < 12:
+        hour += 12
+    elif period == "AM" and hour == 12:
+        hour = 0
+    return SpokenTime(hour % 24, minute, period)
+
+
+def _match_at(tokens: list, i: int) -> Optional[SpokenTime]:
+    token = tokens[i]
+    nxt = tokens[i + 1] if i + 1 < len(tokens) else None
+
+    if token in ("noon", "midday"):
+        return SpokenTime(12, 0, "PM")
+    if token == "midnight":
+        return SpokenTime(0, 0, "AM")
+
+    # Relative: "quarter past one", "twenty minutes to two", "half past ten"
+    if token in ("quarter", "half") or _is_num(token):
+        minute = {"quarter": 15, "half": 30}.get(token, None)
+        if minute is None:
+            minute = _value(token)
+        j = i + 1
+        while j < len(tokens) and tokens[j] in _SKIP:
+            j += 1
+        hour = _NAMED_HOURS.get(tokens[j + 1]) if j + 1 < len(tokens) else None
+        if hour is None and j + 1 < len(tokens) and _is_num(tokens[j + 1]):
+            hour = _value(tokens[j + 1])
+        if hour is not None:
+            period = _period_at(tokens, j + 2)
+            if tokens[j] in _PAST and minute < 60:
+                return _make(hour, minute, period)
+            if tokens[j] in _TO and 0 < minute < 60:
+                return _make((hour - 1) % 24, 60 - minute, period)
+
+    if not isinstance(token, int):
+        return None
+    hour = token
+
+    # Digital: "1:23", "13:05 pm"
+    if nxt == ":" and i + 2 < len(tokens) and isinstance(tokens[i + 2], int):
+        return _make(hour, tokens[i + 2], _period_at(tokens, i + 3))
+    # "twelve o'clock am"
+    if nxt == "oclock":
+        return _make(hour, 0, _period_at(tokens, i + 2))
+    # "thirteen hundred"
+    if nxt in ("hundred", "hundreds"):
+        return _make(hour, 0, _period_at(tokens, i + 2))
+    # "one twenty three am", "one oh five"
+    if _is_num(nxt):
+        return _make(hour, _value(nxt), _period_at(tokens, i + 2))
+    # "eleven pm"
+    period = _period_at(tokens, i + 1)
+    if period is not None:
+        return _make(hour, 0, period)
+    # Four-digit military time: "1323", "0905"
+    if 100 <= hour <= 2359:
+        return _make(hour // 100, hour % 100, None)
+    return None
+
+
+def extract_time(text: Optional[str]) -> Optional[SpokenTime]:
+    """Find the first time of day in a transcription.
+
+    Handles digital forms ("1:23 AM", "01:23", "13:23"), spoken forms ("one
+    twenty-three a.m.", "one oh five", "five o'clock PM", "thirteen
+    hundred"), relative forms ("twenty past one", "quarter to two") and
+    "noon"/"midnight". Deterministic and dependency-free, unlike
+    `dateparser`.
+
+    Args:
+        text: Transcribed text, or None.
+
+    Returns:
+        The first time found, or None if there is none.
+    """
+    if not text:
+        return None
+    tokens = _tokenize(text)
+    for i in range(len(tokens)):
+        found = _match_at(tokens, i)
+        if found is not None:
+            return found
+    return None
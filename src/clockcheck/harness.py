@@ -1,21 +1,99 @@
 import argparse
-from datasets import load_dataset, load_from_disk
 from dotenv import load_dotenv
+import json
 import os
+import sys
+from typing import TYPE_CHECKING, Optional
 
+from clockcheck.registry import MODELS, TRANSCRIBERS
 from clockcheck.utils.config import Config
-import clockcheck.models as models
-import clockcheck.transcribers as transcribers
+
+# datasets, the audio stack and the backends take seconds to import, so
+# they are imported inside the functions that use them; `--help` and
+# `--validate` never pay for them
+if TYPE_CHECKING:
+    from datasets import Dataset
+
+
+def merge_main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(
+        prog="harness.py merge",
+        description="Merge the per-node outputs of a sharded run",
+    )
+    parser.add_argument(
+        "output_dataset_path",
+        help="output_dataset_path the shards ran with; holds shard-*-of-* directories",
+    )
+    parser.add_argument(
+        "--output",
+        help="Where to save the merged dataset (default: <output_dataset_path>/merged)",
+    )
+    args = parser.parse_args(argv)
+    import clockcheck.merge as merge
+
+    output = args.output or os.path.join(args.output_dataset_path, "merged")
+    try:
+        _, report = merge.merge_shards(args.output_dataset_path, output)
+    except ValueError as e:
+        sys.exit(f"Cannot merge {args.output_dataset_path}: {e}")
+    report.pop("shard_grades")
+    print(f"Merge: {json.dumps(report, indent=2)}")
+    print(f"Saved to {output}")
 
 
 async def main():
-    parser = argparse.ArgumentParser(description="Clockcheck harness")
+    if len(sys.argv) > 1 and sys.argv[1] == "merge":
+        merge_main(sys.argv[2:])
+        return
+
+    parser = argparse.ArgumentParser(
+        description="Clockcheck harness",
+        epilog="Run `harness.py merge --help` to combine the outputs of a sharded run.",
+    )
     parser.add_argument(
         "--config",
         default="utils/config.toml",
         help="Path to configuration file (default: utils/config.toml)",
     )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Skip rows already saved under output_dataset_path by a previous run",
+    )
+    parser.add_argument(
+        "--num-shards",
+        type=int,
+        default=1,
+        help="Split the dataset into this many contiguous shards, e.g. one per node",
+    )
+    parser.add_argument(
+        "--shard-index",
+        type=int,
+        default=0,
+        help="Which shard this process runs, from 0 to --num-shards - 1",
+    )
+    parser.add_argument(
+        "--validate",
+        action="store_true",
+        help="Check the config and that its backends import, then exit",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Record per-stage wall/CPU time, event-loop lag and CPU helper "
+        "time to profile.json under output_dataset_path",
+    )
+    parser.add_argument(
+        "--profile-cpu",
+        action="store_true",
+        help="With --profile, also sample the CPU-bound audio helpers with "
+        "cProfile and save cpu.pstats",
+    )
     args = parser.parse_args()
+    if args.num_shards < 1:
+        parser.error("--num-shards must be at least 1")
+    if not 0 <= args.shard_index < args.num_shards:
+        parser.error("--shard-index must be between 0 and --num-shards - 1")
 
     load_dotenv()
 
@@ -30,23 +108,209 @@ async def main():
         raise ValueError(f"Invalid TOML configuration file: {e}")
 
     print(f"Config: {config}")
+    if args.validate:
+        # Only the selected backends are imported
+        for name, model_config in config.model_runs():
+            model_class = MODELS.get(model_config.model_type)
+            print(f"Model {name}: {model_class.__module__}.{model_class.__name__}")
+        transcriber_class = TRANSCRIBERS.get(config.transcriber.model_type)
+        print(
+            f"Transcriber: {transcriber_class.__module__}.{transcriber_class.__name__}"
+        )
+        return
 
-    dataset = (
-        load_dataset(config.dataset_id)
-        if config.dataset_id
-        else load_from_disk(config.dataset_path)
-    )
-    tts_model = models.from_config(config.model)
+    if not args.profile:
+        await run(args, config)
+        return
+    from clockcheck.utils import profiling
+
+    profiling.start(cprofile=args.profile_cpu)
+    try:
+        await run(args, config)
+    finally:
+        # Also written when the run fails, to see where it got to
+        print(profiling.format_summary(profiling.finish(config.output_dataset_path)))
+
+
+async def run(args: argparse.Namespace, config: Config):
+    """Generate, transcribe, grade and save; `main` without the CLI."""
+    from datasets import load_dataset, load_from_disk
+
+    import clockcheck.merge as merge
+    import clockcheck.models as models
+    import clockcheck.pipeline as pipeline
+    import clockcheck.transcribers as transcribers
+    import clockcheck.utils.executor as executor
+    from clockcheck.utils import profiling
+    from clockcheck.utils.shards import ShardWriter, shard_range, with_row_ids
+
+    with profiling.stage("load"):
+        dataset = (
+            load_dataset(config.dataset_id)
+            if config.dataset_id
+            else load_from_disk(config.dataset_path)
+        )
+    executor.configure(config.cpu_executor, config.cpu_workers)
     transcriber = transcribers.from_config(config.transcriber)
 
-    ds_pred = await models.run_ds(dataset, tts_model, config.model)
-    # ds_pred = load_from_disk("./datasets/dataset_oai_coral_0601")
+    # Finished rows are flushed to shards under the output path as they
+    # complete, so a crashed run can pick up where it left off with --resume
+    dataset = with_row_ids(dataset)
+    if args.num_shards > 1:
+        # Row ids are assigned before slicing, so they stay global and the
+        # shards can be merged back with `harness.py merge`
+        total = len(dataset)
+        rows = shard_range(total, args.num_shards, args.shard_index)
+        dataset = dataset.select(rows)
+        config.output_dataset_path = merge.shard_output_path(
+            config.output_dataset_path, args.shard_index, args.num_shards
+        )
+        merge.write_shard_info(
+            config.output_dataset_path, args.shard_index, args.num_shards, rows, total
+        )
+        print(
+            f"Shard {args.shard_index} of {args.num_shards}: "
+            f"rows {rows.start}-{rows.stop - 1}"
+        )
+    if config.sweep:
+        if config.early_stop.enabled:
+            raise ValueError("early_stop can't be combined with sweep yet")
+        runs = [
+            pipeline.SweepRun(
+                name,
+                models.from_config(model_config),
+                model_config,
+                ShardWriter(
+                    os.path.join(config.output_dataset_path, "shards", name),
+                    config.shard_size,
+                    resume=args.resume,
+                    audio_format=config.audio_format,
+                ),
+            )
+            for name, model_config in config.model_runs()
+        ]
+        print(f"Sweeping {', '.join(run.name for run in runs)}")
+        with profiling.stage("pipeline"):
+            ds_pred = await pipeline.run_sweep(dataset, runs, transcriber, config)
+        for run in runs:
+            models.report(run.model)
+        transcribers.report(transcriber)
+        _finish(ds_pred, config, group_by="run")
+        return
+
+    tts_model = models.from_config(config.model)
+    writer = ShardWriter(
+        os.path.join(config.output_dataset_path, "shards"),
+        config.shard_size,
+        resume=args.resume,
+        audio_format=config.audio_format,
+    )
+    if config.early_stop.enabled:
+        from clockcheck.graders.sequential import SequentialStopper, stratified_order
+
+        # Rows go in a stratified order so that whatever prefix gets run
+        # is a balanced sample; the order is seeded, so --resume sees the
+        # same one. Grading as rows finish needs the streaming pipeline.
+        if config.pipeline != "streaming":
+            print("Early stopping runs the streaming pipeline")
+        dataset = dataset.select(stratified_order(dataset, config.early_stop.seed))
+        stopper = SequentialStopper(
+            len(dataset),
+            ci_width=config.early_stop.ci_width,
+            confidence=config.early_stop.confidence,
+            min_rows=config.early_stop.min_rows,
+            wer_threshold=config.grader.wer_threshold,
+        )
+        done = writer.committed()
+        if len(done):
+            graded = [c for c in done.column_names if c != "audio"]
+            stopper.observe(done.select_columns(graded).to_list())
+        with profiling.stage("pipeline"):
+            ds_pred = await pipeline.run_streaming(
+                dataset, tts_model, transcriber, config, writer, stopper
+            )
+        models.report(tts_model)
+        transcribers.report(transcriber)
+        early_stop = stopper.report()
+        print(f"Early stopping: {json.dumps(early_stop, indent=2)}")
+        _finish(ds_pred, config, extra={"early_stop": early_stop})
+        return
+    if config.pipeline == "streaming":
+        with profiling.stage("pipeline"):
+            ds_pred = await pipeline.run_streaming(
+                dataset, tts_model, transcriber, config, writer
+            )
+    else:
+        tts_writer = ShardWriter(
+            os.path.join(config.output_dataset_path, "tts"),
+            config.shard_size,
+            resume=args.resume,
+            audio_format=config.audio_format,
+        )
+        with profiling.stage("tts"):
+            ds_pred = await models.run_ds(dataset, tts_model, config.model, tts_writer)
+        # ds_pred = load_from_disk("./datasets/dataset_oai_coral_0601")
+        if config.prefilter.enabled:
+            import clockcheck.prefilter as prefilter
+
+            with profiling.stage("prefilter"):
+                ds_pred = await prefilter.run_ds(ds_pred, config.prefilter)
+
+        with profiling.stage("asr"):
+            ds_pred = await transcribers.run_ds(
+                ds_pred, transcriber, config.transcriber, writer
+            )
+    models.report(tts_model)
+    transcribers.report(transcriber)
+    _finish(ds_pred, config)
+
+
+def _finish(
+    ds_pred: "Dataset",
+    config: Config,
+    group_by: Optional[str] = None,
+    extra: Optional[dict] = None,
+):
+    """Report latency, grade, and save the predictions and stats.
+
+    With `group_by`, grades are also summarized per value of that column.
+    `extra` is added to grades.json as is.
+    """
+    import clockcheck.graders as graders
+    import clockcheck.merge as merge
+    import clockcheck.utils.executor as executor
+    from clockcheck.utils import profiling, timing
+
+    latency = timing.report(ds_pred, group_by=group_by)
+    print(timing.format_report(latency))
+
+    summary = None
+    if config.grader.enabled:
+        with profiling.stage("grade"):
+            ds_pred, summary = graders.grade_ds(ds_pred, config.grader.wer_threshold)
+            if group_by is not None:
+                by_group = graders.summarize_by(ds_pred, group_by)
+                summary = {**summary, f"by_{group_by}": by_group}
+        print(f"Grades: {json.dumps(summary, indent=2)}")
+        summary.update(extra or {})
 
-    ds_pred = await transcribers.run_ds(ds_pred, transcriber, config.transcriber)
-    # TODO proper error handling, file location
-    # TODO add metadata
-    ds_pred.save_to_disk(config.output_dataset_path)
+    with profiling.stage("save"):
+        ds_pred.save_to_disk(config.output_dataset_path)
+        merge.write_run_info(
+            config.output_dataset_path,
+            config.model_dump(),
+            len(ds_pred),
+            argv=sys.argv[1:],
+        )
+        if summary is not None:
+            with open(
+                os.path.join(config.output_dataset_path, "grades.json"), "w"
+            ) as f:
+                json.dump(summary, f, indent=2)
+        with open(os.path.join(config.output_dataset_path, "latency.json"), "w") as f:
+            json.dump(latency, f, indent=2)
     print(f"Saved to {config.output_dataset_path}")
+    executor.shutdown()
 
 
 if __name__ == "__main__":
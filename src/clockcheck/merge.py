@@ -0,0 +1,181 @@
+import glob
+import json
+import os
+import re
+from collections import Counter
+from datetime import datetime, timezone
+from datasets import Dataset, concatenate_datasets, load_from_disk
+from typing import Optional
+
+import clockcheck.graders as graders
+from clockcheck.utils import timing
+from clockcheck.utils.shards import KEY_COLUMN
+
+SHARD_INFO_NAME = "shard.json"
+RUN_INFO_NAME = "run.json"
+
+_SHARD_DIR_RE = re.compile(r"shard-(\d+)-of-(\d+)$")
+
+
+def shard_output_path(output_path: str, shard_index: int, num_shards: int) -> str:
+    """Where one node's results go under the run's `output_dataset_path`."""
+    return os.path.join(output_path, f"shard-{shard_index:05d}-of-{num_shards:05d}")
+
+
+def write_shard_info(
+    path: str, shard_index: int, num_shards: int, rows: range, total: int
+):
+    """Record which slice of the input dataset a node processed."""
+    os.makedirs(path, exist_ok=True)
+    with open(os.path.join(path, SHARD_INFO_NAME), "w") as f:
+        json.dump(
+            {
+                "shard_index": shard_index,
+                "num_shards": num_shards,
+                "start": rows.start,
+                "stop": rows.stop,
+                "dataset_rows": total,
+            },
+            f,
+            indent=2,
+        )
+
+
+def write_run_info(path: str, config: Optional[dict], rows: int, **extra) -> None:
+    """Record a saved run's config, finish time and size for `clockcheck.report`."""
+    info = {
+        "finished_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "rows": rows,
+        **extra,
+        "config": config,
+    }
+    with open(os.path.join(path, RUN_INFO_NAME), "w") as f:
+        json.dump(info, f, indent=2)
+
+
+def _find_shards(root: str) -> list[tuple[str, dict]]:
+    shards = []
+    for path in sorted(glob.glob(os.path.join(root, "shard-*-of-*"))):
+        if not _SHARD_DIR_RE.search(path) or not os.path.isdir(path):
+            continue
+        info_path = os.path.join(path, SHARD_INFO_NAME)
+        if not os.path.exists(info_path):
+            raise ValueError(
+                f"{path} has no {SHARD_INFO_NAME}; was it written by the harness?"
+            )
+        with open(info_path) as f:
+            shards.append((path, json.load(f)))
+    if not shards:
+        raise ValueError(f"No shard-*-of-* outputs found under {root}")
+    return shards
+
+
+def _check_coverage(shards: list[tuple[str, dict]]) -> None:
+    """Raise unless the shards' row ranges tile the whole input dataset."""
+    counts = {info["num_shards"] for _, info in shards}
+    totals = {info["dataset_rows"] for _, info in shards}
+    if len(counts) > 1 or len(totals) > 1:
+        raise ValueError(
+            f"Shards disagree on num_shards {sorted(counts)} or dataset size {sorted(totals)}"
+        )
+    num_shards, total = counts.pop(), totals.pop()
+    indices = Counter(info["shard_index"] for _, info in shards)
+    missing = sorted(set(range(num_shards)) - set(indices))
+    repeated = sorted(i for i, n in indices.items() if n > 1)
+    if missing or repeated:
+        raise ValueError(f"Missing shards {missing}, repeated shards {repeated}")
+    position = 0
+    for path, info in sorted(shards, key=lambda s: s[1]["start"]):
+        if info["start"] != position:
+            kind = "overlaps" if info["start"] < position else "leaves a gap before"
+            raise ValueError(f"{path} {kind} row {position}")
+        position = info["stop"]
+    if position != total:
+        raise ValueError(f"Shards stop at row {position} of {total}")
+
+
+def merge_shards(root: str, output_path: str) -> tuple[Dataset, dict]:
+    """Combine the per-node outputs under `root` into one dataset and report.
+
+    Checks that the nodes' row ranges cover the input exactly once, and that
+    no row appears in more than one node's results. Rows a node dropped
+    (failed synthesis) are counted as missing, not treated as an error.
+
+    Args:
+        root: The `output_dataset_path` the nodes ran with.
+        output_path: Where to save the merged dataset, grades and latency.
+
+    Returns:
+        The merged dataset and the merged report.
+
+    Raises:
+        ValueError: If shards are missing, overlap, or leave gaps.
+    """
+    shards = _find_shards(root)
+    _check_coverage(shards)
+
+    parts = []
+    missing_rows = {}
+    shard_grades = {}
+    config = None
+    for path, info in shards:
+        if not os.path.exists(os.path.join(path, "dataset_info.json")):
+            raise ValueError(f"{path} has no saved results; finish it with --resume")
+        ds = load_from_disk(path)
+        keys = ds.select_columns(
+            [c for c in (KEY_COLUMN, "run") if c in ds.column_names]
+        ).to_pandas()
+        out_of_range = ~keys[KEY_COLUMN].between(info["start"], info["stop"] - 1)
+        if out_of_range.any():
+            raise ValueError(
+                f"{path} has {int(out_of_range.sum())} rows outside its range"
+            )
+        runs = keys["run"].nunique() if "run" in keys else 1
+        missing = (info["stop"] - info["start"]) * runs - len(keys)
+        if missing:
+            missing_rows[os.path.basename(path)] = int(missing)
+        grades_path = os.path.join(path, "grades.json")
+        if os.path.exists(grades_path):
+            with open(grades_path) as f:
+                shard_grades[os.path.basename(path)] = json.load(f)
+        run_info_path = os.path.join(path, RUN_INFO_NAME)
+        if config is None and os.path.exists(run_info_path):
+            with open(run_info_path) as f:
+                config = json.load(f).get("config")
+        if len(ds):
+            parts.append(ds)
+
+    merged = concatenate_datasets(parts) if parts else Dataset.from_list([])
+    key_columns = [c for c in ("run", KEY_COLUMN) if c in merged.column_names]
+    if len(merged):
+        duplicated = merged.select_columns(key_columns).to_pandas().duplicated()
+        if duplicated.any():
+            raise ValueError(
+                f"{int(duplicated.sum())} rows appear in more than one shard"
+            )
+
+    report: dict = {
+        "shards": len(shards),
+        "rows": len(merged),
+        "missing_rows": missing_rows,
+    }
+    if "wer" in merged.column_names:
+        columns = ["wer", "word_errors", "ref_words", "time_correct", "error"]
+        report["grades"] = graders.summarize({c: merged[c] for c in columns})
+        if "run" in merged.column_names:
+            report["grades"]["by_run"] = graders.summarize_by(merged, "run")
+    report["shard_grades"] = shard_grades
+    group_by = "run" if "run" in merged.column_names else None
+    latency = timing.report(merged, group_by=group_by)
+
+    merged.save_to_disk(output_path)
+    if "grades" in report:
+        with open(os.path.join(output_path, "grades.json"), "w") as f:
+            json.dump(report["grades"], f, indent=2)
+    with open(os.path.join(output_path, "merge.json"), "w") as f:
+        json.dump(report, f, indent=2)
+    with open(os.path.join(output_path, "latency.json"), "w") as f:
+        json.dump(latency, f, indent=2)
+    write_run_info(output_path, config, len(merged), shards=len(shards))
+    print(timing.format_report(latency))
+    return merged, report
@@ -1,17 +1,24 @@
 import asyncio
+from functools import partial
 from aiolimiter import AsyncLimiter
-from datasets import Dataset
-from tqdm.asyncio import tqdm_asyncio
-from typing import Dict, Type
+from typing import TYPE_CHECKING, Optional
 
+from clockcheck.models.cache import CachedTTSModel
 from clockcheck.models.contract import TTSModel
-from clockcheck.utils.config import ModelConfig
-from .openai_tts import OpenAITTSModel
+from clockcheck.utils.config import ModelConfig, ResilienceConfig
+from clockcheck.utils.limits import AdaptiveLimiter, make_limiter
+from clockcheck.utils.pool import map_pool
+from clockcheck.utils.resilience import Resilience
+from clockcheck.utils.shards import ShardWriter
+from clockcheck.utils import profiling, timing
+from clockcheck.utils.audio import SAMPLE_RATE
+from clockcheck.registry import MODELS
 
-# Map model types to their implementation classes
-_MODEL_CLASSES: Dict[str, Type[TTSModel]] = {
-    "openai": OpenAITTSModel,
-}
+if TYPE_CHECKING:
+    from datasets import Dataset
+
+
+_SINGLE_ATTEMPT = ResilienceConfig(max_attempts=1, timeout_s=None)
 
 
 def from_config(config: ModelConfig) -> TTSModel:
@@ -24,77 +31,166 @@ def from_config(config: ModelConfig) -> TTSModel:
         An initialized TTS model instance.
 
     Raises:
-        ValueError: If the model type is not found.
+        ValueError: If the model type is not registered.
     """
-    model_class = _MODEL_CLASSES.get(config.model_type)
-    if not model_class:
-        raise ValueError(f"Unknown model type: {config.model_type}")
-    return model_class.from_config(config)
+    model = MODELS.get(config.model_type).from_config(config)
+    if config.cache_dir:
+        return CachedTTSModel(model, config)
+    return model
 
 
-async def run_ds(ds: Dataset, model: TTSModel, config: ModelConfig) -> Dataset:
-    actual_limiter: asyncio.Semaphore | AsyncLimiter  # Type hint for clarity
+def report(model: TTSModel) -> None:
+    """Print end-of-run statistics for `model`, if it keeps any."""
+    if isinstance(model, CachedTTSModel):
+        print(model.cache.report("TTS cache"))
 
-    if config.requests_per_minute == -1:
-        # Path 1: Sequential processing (one at a time, as fast as possible)
-        # Use asyncio.Semaphore(1) for this.
-        actual_limiter = asyncio.Semaphore(1)
-        # print("Using asyncio.Semaphore(1) for sequential processing.") # Optional: for debugging
-    else:
-        # Path 2: Rate-limited concurrent processing
-        if config.requests_per_minute <= 0:
-            raise ValueError(
-                "config.requests_per_minute must be positive for rate limiting, or -1 for sequential."
-            )
-        # aiolimiter.AsyncLimiter(max_rate, period_seconds)
-        # If config.requests_per_minute is, e.g., 60 (meaning 60 per minute),
-        # then max_rate is 60, and period is 60.0 seconds.
-        actual_limiter = AsyncLimiter(config.requests_per_minute, 60.0)
-        # print(f"Using aiolimiter.AsyncLimiter({config.requests_per_minute}, 60.0) for rate-limited processing.") # Optional
+
+async def generate_row(
+    model: TTSModel,
+    item_data: dict,
+    limiter: Optional[asyncio.Semaphore | AsyncLimiter | AdaptiveLimiter] = None,
+    resilience: Optional[Resilience] = None,
+) -> dict | None:
+    """Synthesize audio for a single dataset row.
+
+    Args:
+        model: TTS model to call.
+        item_data: Dataset row; must contain a 'text' field.
+        limiter: Held around the model request. Cache hits skip it, so they
+            don't count against the rate limit.
+        resilience: Retry and hedging policy for the request; by default
+            it is made once, without a timeout.
+
+    Returns:
+        The row with an added 'audio' field, 'audio_duration_s', and the
+        `timing` columns prefixed 'tts_', or None if generation failed.
+    """
+    try:
+        text_to_process = item_data.get("text")
+        if text_to_process is None:
+            print(f"Skipping item due to missing 'text' field: {item_data}")
+            return None  # Ensure this item is filtered out
+
+        with timing.track() as timer:
+            audio_output = None
+            if isinstance(model, CachedTTSModel):
+                with timer.phase("decode"):
+                    audio_output = await model.lookup(text_to_process)
+            if audio_output is None:
+                if isinstance(model, CachedTTSModel):
+                    call = partial(model.synthesize, text_to_process)
+                else:
+                    call = partial(model.generate, text_to_process)
+                resilience = resilience or Resilience(_SINGLE_ATTEMPT)
+                audio_output = await resilience.call(call, limiter)
+
+        # Return a new dictionary with the original item data plus the audio
+        duration = len(audio_output) / SAMPLE_RATE
+        return {
+            **item_data,
+            "audio": audio_output,
+            "audio_duration_s": duration,
+            **timer.columns("tts", duration),
+        }
+    except Exception as e:
+        # Log the error and the text that failed, if possible
+        failed_text = item_data.get("text", "UNKNOWN_TEXT_IN_ITEM")
+        print(f"Failed to generate audio for text '{failed_text}': {e}")
+        return None  # Mark as None to filter out later
+
+
+def make_limiter_for(
+    config: ModelConfig,
+) -> asyncio.Semaphore | AsyncLimiter | AdaptiveLimiter:
+    """Build the request limiter described by the config's rate and concurrency."""
+    return make_limiter(
+        config.requests_per_minute,
+        60.0,
+        "requests_per_minute",
+        adaptive=config.concurrency == "adaptive",
+        max_concurrency=config.max_concurrency,
+    )
+
+
+async def run_ds(
+    ds: "Dataset",
+    model: TTSModel,
+    config: ModelConfig,
+    writer: Optional[ShardWriter] = None,
+) -> "Dataset":
+    """Generate audio for every row of a dataset.
+
+    Args:
+        ds: Dataset of prompts (expects 'text' field).
+        model: TTS model instance.
+        config: ModelConfig with rate limiting info.
+        writer: If given, finished rows are flushed to its shards as they
+            complete, rows it already holds are skipped, and the returned
+            dataset is loaded back from the shards.
+
+    Returns:
+        Dataset with an added 'audio' field.
+    """
+    from datasets import Dataset
+
+    actual_limiter = make_limiter_for(config)
+    resilience = Resilience(config.resilience)
 
     # This inner function will perform the generation for a single item,
     # respecting the 'actual_limiter' defined above.
     async def process_item(item_data: dict) -> dict | None:
-        # 'actual_limiter' is captured from the outer scope.
         # Both asyncio.Semaphore and aiolimiter.AsyncLimiter support 'async with'.
-        async with actual_limiter:
-            try:
-                text_to_process = item_data.get("text")
-                if text_to_process is None:
-                    print(f"Skipping item due to missing 'text' field: {item_data}")
-                    return None  # Ensure this item is filtered out
-
-                # Call the model's async generate method
-                audio_output = await model.generate(text_to_process)
-
-                # Return a new dictionary with the original item data plus the audio
-                return {**item_data, "audio": audio_output}
-            except Exception as e:
-                # Log the error and the text that failed, if possible
-                failed_text = item_data.get("text", "UNKNOWN_TEXT_IN_ITEM")
-                print(f"Failed to generate audio for text '{failed_text}': {e}")
-                return None  # Mark as None to filter out later
-
-    # Create a list of coroutine jobs by applying process_item to each item in the dataset
-    # ds is assumed to be an iterable (e.g., Hugging Face Dataset)
-    jobs = [process_item(item) for item in ds]
-
-    if not jobs:
+        result = await generate_row(model, item_data, actual_limiter, resilience)
+        if writer is not None and result is not None:
+            await writer.write(result)
+            return None
+        return result
+
+    # Rows are pulled lazily by a fixed pool of workers; the limiter inside
+    # 'process_item' manages the request rate on top of that.
+    if writer is not None:
+        items, total = writer.pending(ds)
+    else:
+        items, total = ds, len(ds)
+    if total == 0 and writer is None:
         print("Warning: Input dataset is empty.")
         return Dataset.from_list([])  # Return an empty dataset
 
-    # Execute all jobs, with progress bar via tqdm_asyncio
-    # The concurrency/rate is managed by the 'actual_limiter' inside each 'process_item' call.
-    results = await tqdm_asyncio.gather(*jobs, desc="Generating audio")
-
-    # Filter out failed jobs (which returned None)
-    successful_results = [r for r in results if r is not None]
-
-    if not successful_results and len(jobs) > 0:
+    successful_results = []
+    async for result in map_pool(
+        process_item,
+        items,
+        config.max_concurrency,
+        ordered=writer is None,
+        desc="Generating audio",
+        total=total,
+    ):
+        # Failed jobs return None and are filtered out
+        if result is not None:
+            successful_results.append(result)
+    if isinstance(actual_limiter, AdaptiveLimiter):
+        print(actual_limiter.report("TTS"))
+    print(resilience.report("TTS"))
+
+    if writer is not None:
+        with profiling.stage("build"):
+            return await writer.load()
+
+    if not successful_results:
         print("Warning: All audio generation jobs failed or returned None.")
 
     # Reconstruct the dataset from the successful results
-    return Dataset.from_list(successful_results)
-
-
-__all__ = ["TTSModel", "from_config"]
+    with profiling.stage("build"):
+        return Dataset.from_list(successful_results)
+
+
+__all__ = [
+    "MODELS",
+    "CachedTTSModel",
+    "TTSModel",
+    "from_config",
+    "generate_row",
+    "make_limiter_for",
+    "report",
+    "run_ds",
+]
@@ -0,0 +1,53 @@
+import numpy as np
+
+from clockcheck.models.contract import TTSModel
+from clockcheck.registry import MODELS
+from clockcheck.utils.audio import decode, encode_audio
+from clockcheck.utils.cache import DiskCache, cache_key
+from clockcheck.utils.config import ModelConfig
+from clockcheck.utils.executor import run_cpu
+
+
+class CachedTTSModel(TTSModel):
+    """Content-addressed synthesis cache in front of another TTSModel.
+
+    Entries are keyed on (base_url, model_id, voice, text) and stored as
+    16-bit FLAC at 24kHz, so rerunning a config with an unchanged `[model]`
+    section makes no TTS requests.
+    """
+
+    def __init__(self, inner: TTSModel, config: ModelConfig):
+        self.inner = inner
+        self.config = config
+        self.cache = DiskCache(
+            config.cache_dir, config.cache_max_mb * 1024 * 1024, suffix=".flac"
+        )
+
+    @classmethod
+    def from_config(cls, config: ModelConfig) -> "CachedTTSModel":
+        return cls(MODELS.get(config.model_type).from_config(config), config)
+
+    def _key(self, text: str) -> str:
+        return cache_key(
+            self.config.base_url, self.config.model_id, self.config.voice, text
+        )
+
+    async def lookup(self, text: str) -> np.ndarray | None:
+        """Return cached audio for `text` without calling the model."""
+        cached = await self.cache.get(self._key(text))
+        if cached is None:
+            return None
+        return await run_cpu(decode, cached)
+
+    async def synthesize(self, text: str) -> np.ndarray:
+        """Call the wrapped model and store its output, skipping the lookup."""
+        audio = await self.inner.generate(text)
+        encoded = await run_cpu(encode_audio, audio, "flac")
+        await self.cache.put(self._key(text), encoded["bytes"])
+        return audio
+
+    async def generate(self, text: str) -> np.ndarray:
+        cached = await self.lookup(text)
+        if cached is not None:
+            return cached
+        return await self.synthesize(text)
@@ -1,12 +1,26 @@
-import io
-import librosa
 import numpy as np
-from openai import AsyncOpenAI
-import soundfile as sf
+from openai import (
+    AsyncOpenAI,
+    BadRequestError,
+    DefaultAsyncHttpxClient,
+    UnprocessableEntityError,
+)
 from typing import Optional
 
 from clockcheck.models.contract import TTSModel
+from clockcheck.utils.audio import SAMPLE_RATE, decode
 from clockcheck.utils.config import ModelConfig
+from clockcheck.utils.executor import run_cpu
+from clockcheck.utils import timing
+
+# Initial PCM buffer size when the server doesn't send a Content-Length;
+# grown by doubling. Ten seconds covers a typical prompt.
+_INITIAL_PCM_BYTES = 10 * SAMPLE_RATE * 2
+
+
+def _pcm_to_float(buffer: np.ndarray, size: int) -> np.ndarray:
+    # A trailing odd byte would be half a sample; drop it
+    return buffer[: size - size % 2].view("<i2").astype(np.float32) / 32768.0
 
 
 class OpenAITTSModel(TTSModel):
@@ -16,10 +30,28 @@ class OpenAITTSModel(TTSModel):
         model: str = "tts-1",
         endpoint: Optional[str] = None,
         voice: str = "nova",
+        stream: bool = False,
     ):
-        self.client = AsyncOpenAI(api_key=api_key, base_url=endpoint)
+        """
+        Args:
+            api_key: OpenAI API key; local servers accept any value.
+            model: Model name.
+            endpoint: Base URL of an OpenAI-compatible server.
+            voice: Voice name.
+            stream: Request raw PCM and assemble it as it arrives, instead
+                of buffering and decoding a WAV file. Switches back to WAV
+                for the rest of the run if the server rejects 'pcm'.
+        """
+        self.client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=endpoint,
+            http_client=DefaultAsyncHttpxClient(event_hooks=timing.event_hooks()),
+            # Retries are counted and paced by clockcheck.utils.resilience
+            max_retries=0,
+        )
         self.model = model
         self.voice = voice
+        self.stream = stream
 
     @classmethod
     def from_config(cls, config: ModelConfig) -> "OpenAITTSModel":
@@ -32,18 +64,53 @@ class OpenAITTSModel(TTSModel):
             )
         model = config.model_id or "tts-1"
         voice = config.voice or "nova"
-        return cls(api_key=api_key, model=model, endpoint=config.base_url, voice=voice)
+        return cls(
+            api_key=api_key,
+            model=model,
+            endpoint=config.base_url,
+            voice=voice,
+            stream=config.stream,
+        )
 
     async def generate(self, text: str) -> np.ndarray:
+        if self.stream:
+            try:
+                return await self._generate_pcm(text)
+            except (BadRequestError, UnprocessableEntityError) as e:
+                print(f"Server rejected streaming PCM, falling back to WAV: {e}")
+                self.stream = False
         response = await self.client.audio.speech.create(
             model=self.model, voice=self.voice, input=text, response_format="wav"
         )
-        # The response is an MP3 file. We need to decode to PCM 24kHz
-        audio_bytes = response.content
-        with io.BytesIO(audio_bytes) as buf:
-            buf.seek(0)
-            data, samplerate = sf.read(buf, dtype="float32")
-        # Resample if necessary
-        if samplerate != 24000:
-            data = librosa.resample(data.T, orig_sr=samplerate, target_sr=24000)
-        return data.astype(np.float32)
+        # The response is a WAV file. Decode to PCM 24kHz off the event loop,
+        # resampling if necessary
+        with timing.phase("decode"):
+            return await run_cpu(decode, response.content, SAMPLE_RATE)
+
+    async def _generate_pcm(self, text: str) -> np.ndarray:
+        """Stream 24 kHz 16-bit mono PCM into a preallocated buffer."""
+        async with self.client.audio.speech.with_streaming_response.create(
+            model=self.model, voice=self.voice, input=text, response_format="pcm"
+        ) as response:
+            length = response.headers.get("content-length")
+            buffer = np.empty(
+                int(length) if length else _INITIAL_PCM_BYTES, dtype=np.uint8
+            )
+            size = 0
+            async for chunk in response.iter_bytes():
+                if not chunk:
+                    continue
+                if size == 0:
+                    timing.mark("first_audio")
+                end = size + len(chunk)
+                if end > len(buffer):
+                    grown = np.empty(max(end, 2 * len(buffer)), dtype=np.uint8)
+                    grown[:size] = buffer[:size]
+                    buffer = grown
+                buffer[size:end] = np.frombuffer(chunk, dtype=np.uint8)
+                size = end
+        with timing.phase("decode"):
+            if size >= 4 and buffer[:4].tobytes() == b"RIFF":
+                # The server ignored response_format and sent WAV
+                return await run_cpu(decode, buffer[:size].tobytes(), SAMPLE_RATE)
+            return _pcm_to_float(buffer, size)
@@ -0,0 +1,189 @@
+from datasets import Dataset, concatenate_datasets
+from itertools import chain, zip_longest
+from typing import NamedTuple, Optional
+
+import clockcheck.models as models
+import clockcheck.prefilter as prefilter
+import clockcheck.transcribers as transcribers
+from clockcheck.graders.sequential import SequentialStopper
+from clockcheck.models.contract import TTSModel
+from clockcheck.transcribers.contract import Transcriber
+from clockcheck.utils.config import Config, ModelConfig
+from clockcheck.utils.limits import AdaptiveLimiter
+from clockcheck.utils import profiling
+from clockcheck.utils.pool import map_pool
+from clockcheck.utils.resilience import Resilience
+from clockcheck.utils.shards import ShardWriter
+
+
+async def run_streaming(
+    ds: Dataset,
+    model: TTSModel,
+    transcriber: Transcriber,
+    config: Config,
+    writer: ShardWriter,
+    stopper: Optional[SequentialStopper] = None,
+) -> Dataset:
+    """Synthesize and transcribe a dataset as a single pipelined pass.
+
+    A pool of `config.queue_size` workers each takes a prompt, synthesizes
+    it and hands the clip straight to the transcriber, so ASR runs while
+    TTS is still working through the dataset. TTS and ASR keep their own
+    limiters. Finished rows are handed to `writer` and dropped from memory,
+    so at most `config.queue_size` in-flight waveforms plus one shard are
+    held at once.
+
+    Args:
+        ds: Dataset of prompts (expects 'text' field).
+        model: TTS model instance.
+        transcriber: Transcriber instance.
+        config: Full harness config; uses the model and transcriber rate
+            limits, `queue_size` and `prefilter`.
+        writer: Shard writer for finished rows. Rows it already holds are
+            skipped.
+        stopper: If given, every finished row is graded by it, and no new
+            rows are started once it decides to stop; rows already in
+            flight still finish.
+
+    Returns:
+        Dataset with 'audio' and 'transcribed_text' fields, loaded back from
+        the writer's shards. Row order follows completion order, not input
+        order.
+    """
+    if config.queue_size <= 0:
+        raise ValueError("config.queue_size must be positive.")
+
+    tts_limiter = models.make_limiter_for(config.model)
+    asr_limiter = transcribers.make_limiter_for(config.transcriber)
+    tts_resilience = Resilience(config.model.resilience)
+    asr_resilience = Resilience(config.transcriber.resilience)
+
+    async def process_item(item_data: dict) -> None:
+        row = await models.generate_row(model, item_data, tts_limiter, tts_resilience)
+        if row is None:
+            return
+        if config.prefilter.enabled:
+            row = await prefilter.check_row(row, config.prefilter)
+        result = await transcribers.transcribe_row(
+            transcriber, row, asr_limiter, asr_resilience
+        )
+        if result is not None:
+            await writer.write(result)
+            if stopper is not None:
+                stopper.observe([result])
+
+    items, total = writer.pending(ds)
+    if stopper is not None:
+        items = stopper.gate(items)
+    async for _ in map_pool(
+        process_item,
+        items,
+        config.queue_size,
+        desc="Generating and transcribing",
+        total=total,
+    ):
+        pass
+
+    for label, limiter in (("TTS", tts_limiter), ("ASR", asr_limiter)):
+        if isinstance(limiter, AdaptiveLimiter):
+            print(limiter.report(label))
+    for label, resilience in (("TTS", tts_resilience), ("ASR", asr_resilience)):
+        print(resilience.report(label))
+    with profiling.stage("build"):
+        return await writer.load()
+
+
+class SweepRun(NamedTuple):
+    name: str
+    model: TTSModel
+    config: ModelConfig
+    writer: ShardWriter
+
+
+async def run_sweep(
+    ds: Dataset,
+    runs: list[SweepRun],
+    transcriber: Transcriber,
+    config: Config,
+) -> Dataset:
+    """Synthesize a dataset with several TTS setups and transcribe it all.
+
+    Like `run_streaming`, but prompts from every run are interleaved into
+    one worker pool of `config.queue_size` workers per run. Each run keeps
+    its own TTS limiter, while all clips go through the same transcriber
+    and ASR limiter, so the ASR backend stays busy for the whole sweep
+    rather than idling between runs.
+
+    Args:
+        ds: Dataset of prompts (expects 'text' field).
+        runs: The TTS setups to evaluate, each with its own shard writer.
+        transcriber: Transcriber shared by every run.
+        config: Full harness config; uses the transcriber rate limits and
+            `queue_size`.
+
+    Returns:
+        All runs' rows in one dataset, with a 'run' column naming the run.
+    """
+    if config.queue_size <= 0:
+        raise ValueError("config.queue_size must be positive.")
+
+    tts_limiters = {run.name: models.make_limiter_for(run.config) for run in runs}
+    asr_limiter = transcribers.make_limiter_for(config.transcriber)
+    tts_resilience = {run.name: Resilience(run.config.resilience) for run in runs}
+    asr_resilience = Resilience(config.transcriber.resilience)
+    by_name = {run.name: run for run in runs}
+
+    async def process_item(item_data: dict) -> None:
+        run = by_name[item_data["run"]]
+        row = await models.generate_row(
+            run.model, item_data, tts_limiters[run.name], tts_resilience[run.name]
+        )
+        if row is None:
+            return
+        if config.prefilter.enabled:
+            row = await prefilter.check_row(row, config.prefilter)
+        result = await transcribers.transcribe_row(
+            transcriber, row, asr_limiter, asr_resilience
+        )
+        if result is not None:
+            await run.writer.write(result)
+
+    def tagged(name: str, items):
+        for item in items:
+            yield {**item, "run": name}
+
+    streams = []
+    total = 0
+    for run in runs:
+        items, remaining = run.writer.pending(ds)
+        streams.append(tagged(run.name, items))
+        total += remaining
+    # Round-robin across runs so every TTS backend has work from the start
+    _skip = object()
+    interleaved = (
+        item
+        for item in chain.from_iterable(zip_longest(*streams, fillvalue=_skip))
+        if item is not _skip
+    )
+
+    async for _ in map_pool(
+        process_item,
+        interleaved,
+        config.queue_size * len(runs),
+        desc=f"Sweeping {len(runs)} runs",
+        total=total,
+    ):
+        pass
+
+    for name, limiter in tts_limiters.items():
+        if isinstance(limiter, AdaptiveLimiter):
+            print(limiter.report(f"TTS {name}"))
+    if isinstance(asr_limiter, AdaptiveLimiter):
+        print(asr_limiter.report("ASR"))
+    for name, resilience in tts_resilience.items():
+        print(resilience.report(f"TTS {name}"))
+    print(asr_resilience.report("ASR"))
+    with profiling.stage("build"):
+        loaded = [await run.writer.load() for run in runs]
+        parts = [part for part in loaded if len(part)]
+        return concatenate_datasets(parts) if parts else Dataset.from_list([])
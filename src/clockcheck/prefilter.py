@@ -0,0 +1,189 @@
+"""Cheap sanity checks on synthesized audio, run before transcription.
+
+Some TTS servers occasionally return silence, truncated clips or runaway
+babble. Sending those through resampling and a full ASR inference wastes
+the slowest stage of the pipeline, so clips outside the configured bounds
+are tagged with an 'audio_reject_reason' and never transcribed; the
+grader counts them as "bad_audio" failures.
+
+Stats for a batch are computed in one vectorized pass: the clips are laid
+end to end in a single array and reduced per clip with `np.ufunc.reduceat`.
+"""
+
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+from datasets import Dataset
+
+from clockcheck.utils.audio import SAMPLE_RATE, open_audio, to_array
+from clockcheck.utils.config import PrefilterConfig
+from clockcheck.utils.executor import run_cpu
+from clockcheck.utils.pool import map_pool
+
+REJECT_COLUMN = "audio_reject_reason"
+
+STAT_COLUMNS = [
+    "audio_duration_s",
+    "audio_rms_db",
+    "audio_peak",
+    "audio_silence_ratio",
+    "audio_clip_ratio",
+]
+"""
+Per-clip stats stored next to the audio:
+
+- audio_duration_s: length in seconds
+- audio_rms_db: overall RMS level in dBFS
+- audio_peak: largest absolute sample
+- audio_silence_ratio: fraction of 20 ms frames quieter than `silence_db`
+- audio_clip_ratio: fraction of samples at (or within 0.1% of) full scale
+"""
+
+REASONS = ["empty", "too_short", "too_long", "silent", "clipped"]
+
+FRAME_SECONDS = 0.02
+CLIP_LEVEL = 0.999
+
+
+def _segment_reduce(
+    ufunc: np.ufunc, values: np.ndarray, starts: np.ndarray, sizes: np.ndarray
+) -> np.ndarray:
+    """Reduce consecutive segments of `values`; empty segments give 0."""
+    out = np.zeros(len(sizes), dtype=np.float64)
+    nonempty = sizes > 0
+    if nonempty.any():
+        # The next non-empty segment's start is where this one ends
+        out[nonempty] = ufunc.reduceat(values, starts[nonempty])
+    return out
+
+
+def audio_stats(
+    clips: Sequence[np.ndarray], silence_db: float = -45.0
+) -> Dict[str, np.ndarray]:
+    """Compute `STAT_COLUMNS` for a batch of 24 kHz float waveforms."""
+    lengths = np.array([len(clip) for clip in clips], dtype=np.int64)
+    starts = np.cumsum(lengths) - lengths
+    if lengths.sum():
+        flat = np.concatenate([np.asarray(c, dtype=np.float32) for c in clips])
+    else:
+        flat = np.zeros(0, dtype=np.float32)
+    magnitude = np.abs(flat)
+    squares = flat.astype(np.float64) ** 2
+    safe_lengths = np.maximum(lengths, 1)
+
+    rms = np.sqrt(_segment_reduce(np.add, squares, starts, lengths) / safe_lengths)
+    peak = _segment_reduce(np.maximum, magnitude, starts, lengths)
+    clipped = _segment_reduce(
+        np.add, (magnitude >= CLIP_LEVEL).astype(np.float64), starts, lengths
+    )
+
+    # Mean energy of every whole frame, from a running sum of squares
+    frame = int(FRAME_SECONDS * SAMPLE_RATE)
+    frames = lengths // frame
+    frame_starts = np.cumsum(frames) - frames
+    within = np.arange(frames.sum()) - np.repeat(frame_starts, frames)
+    sample_index = np.repeat(starts, frames) + within * frame
+    running = np.concatenate([[0.0], np.cumsum(squares)])
+    energy = (running[sample_index + frame] - running[sample_index]) / frame
+    silent_frames = (energy < 10 ** (silence_db / 10)).astype(np.float64)
+    silence = _segment_reduce(np.add, silent_frames, frame_starts, frames)
+
+    rms_db = 20 * np.log10(np.maximum(rms, 1e-10))
+    # Clips shorter than a frame are silent if they're quiet overall
+    silence_ratio = np.where(
+        frames > 0, silence / np.maximum(frames, 1), (rms_db < silence_db) * 1.0
+    )
+    return {
+        "audio_duration_s": lengths / SAMPLE_RATE,
+        "audio_rms_db": rms_db,
+        "audio_peak": peak,
+        "audio_silence_ratio": silence_ratio,
+        "audio_clip_ratio": clipped / safe_lengths,
+    }
+
+
+def check_batch(
+    clips: Sequence[np.ndarray], config: PrefilterConfig
+) -> Dict[str, list]:
+    """Stats and reject reason (None for clips that pass) for each clip.
+
+    When a clip fails several checks, the first of `REASONS` wins.
+    """
+    stats = audio_stats(clips, config.silence_db)
+    duration = stats["audio_duration_s"]
+    conditions = [
+        duration == 0,
+        duration < config.min_duration_s,
+        duration > config.max_duration_s,
+        stats["audio_silence_ratio"] > config.max_silence_ratio,
+        stats["audio_clip_ratio"] > config.max_clip_ratio,
+    ]
+    reasons: List[Optional[str]] = [None] * len(clips)
+    failed = np.select(conditions, range(len(REASONS)), default=-1)
+    for i in np.flatnonzero(failed >= 0):
+        reasons[i] = REASONS[failed[i]]
+    columns = {name: values.tolist() for name, values in stats.items()}
+    columns[REJECT_COLUMN] = reasons
+    return columns
+
+
+def _check_stored(audio_values: list, config: PrefilterConfig) -> Dict[str, list]:
+    return check_batch([to_array(audio) for audio in audio_values], config)
+
+
+async def check_row(row: dict, config: PrefilterConfig) -> dict:
+    """Add the stats and reject reason to a freshly synthesized row."""
+    columns = await run_cpu(check_batch, [to_array(row["audio"])], config)
+    return {**row, **{name: values[0] for name, values in columns.items()}}
+
+
+async def run_ds(
+    ds: Dataset, config: PrefilterConfig, batch_size: int = 256
+) -> Dataset:
+    """Add the stats and reject reason columns to a dataset of clips.
+
+    Batches are decoded and checked on the shared CPU executor, a few at a
+    time; only the audio column is read.
+
+    Returns:
+        `ds` with `STAT_COLUMNS` and `REJECT_COLUMN` added (or replaced).
+    """
+    if "audio" not in ds.column_names or len(ds) == 0:
+        return ds
+
+    async def check(batch: dict) -> Dict[str, list]:
+        return await run_cpu(_check_stored, batch["audio"], config)
+
+    audio = open_audio(ds.select_columns(["audio"]))
+    columns: Dict[str, list] = {}
+    async for result in map_pool(
+        check,
+        audio.iter(batch_size=batch_size),
+        num_workers=4,
+        ordered=True,
+        desc="Checking audio",
+        total=-(-len(ds) // batch_size),
+    ):
+        for name, values in result.items():
+            columns.setdefault(name, []).extend(values)
+
+    for name, values in columns.items():
+        if name in ds.column_names:
+            ds = ds.remove_columns(name)
+        ds = ds.add_column(name, values)
+    rejected = [reason for reason in columns[REJECT_COLUMN] if reason]
+    if rejected:
+        counts = {r: rejected.count(r) for r in REASONS if r in rejected}
+        print(f"Prefilter: {len(rejected)} of {len(ds)} clips rejected {counts}")
+    return ds
+
+
+__all__ = [
+    "REASONS",
+    "REJECT_COLUMN",
+    "STAT_COLUMNS",
+    "audio_stats",
+    "check_batch",
+    "check_row",
+    "run_ds",
+]
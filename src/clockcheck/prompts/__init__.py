@@ -0,0 +1,206 @@
+from datasets import Dataset, Features, IterableDataset, Value
+from typing import Callable, Dict, Iterator, List, Optional, Sequence
+
+from clockcheck.utils.shards import KEY_COLUMN, shard_range
+
+
+def _twelve_hour(hour: int) -> int:
+    return hour % 12 or 12
+
+
+def _period(hour: int) -> str:
+    return "AM" if hour < 12 else "PM"
+
+
+FORMATS: Dict[str, Callable[[int, int], str]] = {
+    "12h": lambda h, m: f"{_twelve_hour(h)}:{m:02d} {_period(h)}",
+    "12h_compact": lambda h, m: f"{_twelve_hour(h)}:{m:02d}{_period(h).lower()}",
+    "12h_dotted": lambda h, m: f"{_twelve_hour(h)}:{m:02d} {_period(h)[0].lower()}.m.",
+    "12h_padded": lambda h, m: f"{_twelve_hour(h):02d}:{m:02d} {_period(h)}",
+    "24h": lambda h, m: f"{h}:{m:02d}",
+    "24h_padded": lambda h, m: f"{h:02d}:{m:02d}",
+}
+"""
+Ways of writing a time of day, keyed by name:
+
+- 12h: "1:23 PM" (the format of the original time-simple set)
+- 12h_compact: "1:23pm"
+- 12h_dotted: "1:23 p.m."
+- 12h_padded: "01:23 PM"
+- 24h: "13:23"
+- 24h_padded: "01:23", "13:23"
+"""
+
+TEMPLATES: List[str] = [
+    "The time is {time_string}.",
+    "It's {time_string}.",
+    "Set an alarm for {time_string}, please.",
+    "The meeting was moved to {time_string}, so don't be late.",
+    "Your train leaves at {time_string} from platform four.",
+]
+"""
+Default sentence templates; each must contain '{time_string}'. The first is
+the original time-simple template.
+"""
+
+MINUTES_PER_DAY = 24 * 60
+
+PROMPT_FEATURES = Features(
+    {
+        KEY_COLUMN: Value("int64"),
+        "template_id": Value("int32"),
+        "format": Value("string"),
+        "time_string": Value("string"),
+        "hour": Value("int32"),
+        "minute": Value("int32"),
+        "period": Value("string"),
+        "text": Value("string"),
+        "ground_truth": Value("string"),
+    }
+)
+
+
+def _check(templates: Sequence[str], formats: Sequence[str]) -> None:
+    for template in templates:
+        if "{time_string}" not in template:
+            raise ValueError(f"Template has no '{{time_string}}': {template!r}")
+    unknown = [f for f in formats if f not in FORMATS]
+    if unknown:
+        raise ValueError(f"Unknown formats {unknown}; choose from {list(FORMATS)}")
+
+
+def num_prompts(templates: Sequence[str], formats: Sequence[str]) -> int:
+    """Size of the templates x formats x times-of-day cross product."""
+    return len(templates) * len(formats) * MINUTES_PER_DAY
+
+
+def prompt_at(index: int, templates: Sequence[str], formats: Sequence[str]) -> dict:
+    """The `index`-th prompt of the cross product, computed directly.
+
+    Prompts are ordered by template, then format, then time of day, and
+    `index` is also the row's 'row_id', so ids are stable however the set
+    is sharded.
+    """
+    template_id, rest = divmod(index, len(formats) * MINUTES_PER_DAY)
+    format_id, minute_of_day = divmod(rest, MINUTES_PER_DAY)
+    hour, minute = divmod(minute_of_day, 60)
+    fmt = formats[format_id]
+    time_string = FORMATS[fmt](hour, minute)
+    text = templates[template_id].format(time_string=time_string)
+    return {
+        KEY_COLUMN: index,
+        "template_id": template_id,
+        "format": fmt,
+        "time_string": time_string,
+        "hour": hour,
+        "minute": minute,
+        "period": _period(hour),
+        "text": text,
+        "ground_truth": text,
+    }
+
+
+def _generate(
+    shards: List[int],
+    num_shards: int,
+    templates: Sequence[str],
+    formats: Sequence[str],
+) -> Iterator[dict]:
+    total = num_prompts(templates, formats)
+    for shard_index in shards:
+        for index in shard_range(total, num_shards, shard_index):
+            yield prompt_at(index, templates, formats)
+
+
+def iter_prompts(
+    templates: Optional[Sequence[str]] = None,
+    formats: Optional[Sequence[str]] = None,
+    num_shards: int = 1,
+    shard_index: int = 0,
+) -> Iterator[dict]:
+    """Lazily yield one shard of the prompt cross product.
+
+    Args:
+        templates: Sentence templates; defaults to `TEMPLATES`.
+        formats: Names from `FORMATS`; defaults to all of them.
+        num_shards: Number of contiguous shards to split the prompts into.
+        shard_index: Which shard to yield.
+    """
+    templates = list(templates or TEMPLATES)
+    formats = list(formats or FORMATS)
+    _check(templates, formats)
+    yield from _generate([shard_index], num_shards, templates, formats)
+
+
+def prompt_dataset(
+    templates: Optional[Sequence[str]] = None,
+    formats: Optional[Sequence[str]] = None,
+    num_shards: int = 8,
+) -> IterableDataset:
+    """The prompt cross product as a lazy `IterableDataset`.
+
+    Nothing is materialized; rows are computed as they are iterated.
+    `num_shards` sets `ds.n_shards`, which is how DataLoader workers and
+    `datasets.distributed.split_dataset_by_node` split the set.
+    """
+    templates = list(templates or TEMPLATES)
+    formats = list(formats or FORMATS)
+    _check(templates, formats)
+    return IterableDataset.from_generator(
+        _generate,
+        features=PROMPT_FEATURES,
+        gen_kwargs={
+            "shards": list(range(num_shards)),
+            "num_shards": num_shards,
+            # Tuples, since datasets shards every list in gen_kwargs
+            "templates": tuple(templates),
+            "formats": tuple(formats),
+        },
+    )
+
+
+def save_prompts(
+    path: str,
+    templates: Optional[Sequence[str]] = None,
+    formats: Optional[Sequence[str]] = None,
+    num_shards: int = 8,
+) -> Dataset:
+    """Write the prompt cross product to `path` as sharded Arrow.
+
+    Rows are streamed to an Arrow cache file as they are generated and then
+    saved with `save_to_disk`, so memory stays flat however many prompts
+    there are. The result loads memory-mapped with `load_from_disk`, which
+    is what the harness's `dataset_path` expects.
+
+    Returns:
+        The saved dataset.
+    """
+    templates = list(templates or TEMPLATES)
+    formats = list(formats or FORMATS)
+    _check(templates, formats)
+    ds = Dataset.from_generator(
+        _generate,
+        features=PROMPT_FEATURES,
+        gen_kwargs={
+            "shards": list(range(num_shards)),
+            "num_shards": num_shards,
+            # Tuples, since datasets shards every list in gen_kwargs
+            "templates": tuple(templates),
+            "formats": tuple(formats),
+        },
+    )
+    ds.save_to_disk(path, num_shards=min(num_shards, max(len(ds), 1)))
+    return ds
+
+
+__all__ = [
+    "FORMATS",
+    "PROMPT_FEATURES",
+    "TEMPLATES",
+    "iter_prompts",
+    "num_prompts",
+    "prompt_at",
+    "prompt_dataset",
+    "save_prompts",
+    "shard_range",
+]
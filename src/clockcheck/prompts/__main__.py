@@ -0,0 +1,44 @@
+import argparse
+
+from clockcheck.prompts import FORMATS, TEMPLATES, num_prompts, save_prompts
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a prompt dataset")
+    parser.add_argument("output_path", help="Directory to save the dataset to")
+    parser.add_argument(
+        "--templates",
+        nargs="+",
+        help="Sentence templates containing '{time_string}' (default: built-in set)",
+    )
+    parser.add_argument(
+        "--templates-file",
+        help="File with one template per line; overrides --templates",
+    )
+    parser.add_argument(
+        "--formats",
+        nargs="+",
+        choices=list(FORMATS),
+        help="Time formats to include (default: all)",
+    )
+    parser.add_argument(
+        "--num-shards",
+        type=int,
+        default=8,
+        help="Number of Arrow shards to write (default: 8)",
+    )
+    args = parser.parse_args()
+
+    templates = args.templates or TEMPLATES
+    if args.templates_file:
+        with open(args.templates_file) as f:
+            templates = [line.rstrip("\n") for line in f if line.strip()]
+    formats = args.formats or list(FORMATS)
+
+    print(f"Generating {num_prompts(templates, formats)} prompts")
+    save_prompts(args.output_path, templates, formats, args.num_shards)
+    print(f"Saved to {args.output_path}")
+
+
+if __name__ == "__main__":
+    main()
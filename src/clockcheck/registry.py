@@ -0,0 +1,83 @@
+"""Name-to-class registries for TTS models and transcribers.
+
+Backends are recorded as "module:Class" strings and only imported when a
+config selects them, so e.g. a whisper.cpp run never imports the OpenAI
+client. Third-party packages add backends through entry points:
+
+    [project.entry-points."clockcheck.models"]
+    my-tts = "my_package.tts:MyTTSModel"
+
+This module must stay cheap to import: `utils.config` uses it to validate
+backend names.
+"""
+
+from importlib import import_module
+from importlib.metadata import entry_points
+from typing import Dict, Generic, List, Optional, Type, TypeVar, Union
+
+T = TypeVar("T")
+
+
+class Registry(Generic[T]):
+    def __init__(self, kind: str, group: str, builtins: Dict[str, str]):
+        """
+        Args:
+            kind: What the registry holds, for error messages.
+            group: Entry point group scanned for third-party backends.
+            builtins: Backends shipped with clockcheck, as "module:Class".
+        """
+        self.kind = kind
+        self.group = group
+        self._targets: Dict[str, Union[str, Type[T]]] = dict(builtins)
+        self._plugins_loaded = False
+
+    def _load_plugins(self) -> None:
+        if self._plugins_loaded:
+            return
+        self._plugins_loaded = True
+        for ep in entry_points(group=self.group):
+            # Built-ins and explicit `register` calls win over plugins
+            self._targets.setdefault(ep.name, ep.value)
+
+    def register(self, name: str, target: Union[str, Type[T]]) -> None:
+        """Add a backend, either as a class or as a lazy "module:Class" path."""
+        self._targets[name] = target
+
+    def names(self) -> List[str]:
+        """Every registered backend name. Nothing is imported."""
+        self._load_plugins()
+        return sorted(self._targets)
+
+    def get(self, name: str) -> Type[T]:
+        """Import (if needed) and return the backend class registered as `name`.
+
+        Raises:
+            ValueError: If no backend is registered under `name`.
+        """
+        self._load_plugins()
+        target: Optional[Union[str, Type[T]]] = self._targets.get(name)
+        if target is None:
+            raise ValueError(
+                f"Unknown {self.kind} type: {name}. Available: {', '.join(self.names())}"
+            )
+        if isinstance(target, str):
+            module_name, _, attr = target.partition(":")
+            target = getattr(import_module(module_name), attr)
+            self._targets[name] = target
+        return target
+
+
+MODELS: Registry = Registry(
+    "model",
+    "clockcheck.models",
+    {"openai": "clockcheck.models.openai_tts:OpenAITTSModel"},
+)
+
+TRANSCRIBERS: Registry = Registry(
+    "transcriber",
+    "clockcheck.transcribers",
+    {
+        "openai": "clockcheck.transcribers.openai_asr:OpenAITranscriber",
+        "whisper-cpp": "clockcheck.transcribers.whisper_cpp:WhisperCppTranscriber",
+    },
+)
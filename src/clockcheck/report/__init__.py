@@ -0,0 +1,225 @@
+"""Index saved runs and compare them without loading their audio.
+
+Every dataset saved by the harness (or by `harness.py merge`) under an
+output root is a run. Only the few columns a leaderboard needs are read,
+straight from the memory-mapped Arrow files, so the audio column is never
+paged in and dozens of runs aggregate in seconds.
+"""
+
+import json
+import os
+from datetime import datetime, timezone
+from typing import Dict, List, NamedTuple, Optional
+
+import pandas as pd
+import pyarrow as pa
+
+import clockcheck.graders as graders
+from clockcheck.merge import RUN_INFO_NAME, SHARD_INFO_NAME
+
+SCAN_COLUMNS = [
+    "run",
+    "hour",
+    "minute",
+    "wer",
+    "word_errors",
+    "ref_words",
+    "time_correct",
+    "error",
+]
+"""Columns read from graded runs."""
+
+
+class RunEntry(NamedTuple):
+    name: str
+    """Path relative to the output root"""
+    path: str
+    date: str
+    rows: int
+    config: Optional[dict]
+    """The harness config, if the run recorded it"""
+
+
+def _arrow_files(path: str) -> List[str]:
+    with open(os.path.join(path, "state.json")) as f:
+        state = json.load(f)
+    return [os.path.join(path, entry["filename"]) for entry in state["_data_files"]]
+
+
+def open_table(path: str) -> pa.Table:
+    """A saved dataset as a memory-mapped Arrow table.
+
+    Nothing is read until a column is used, and then only that column's
+    pages.
+    """
+    tables = [
+        pa.ipc.open_stream(pa.memory_map(file)).read_all()
+        for file in _arrow_files(path)
+    ]
+    return pa.concat_tables(tables) if len(tables) > 1 else tables[0]
+
+
+def index_runs(root: str, include_shards: bool = False) -> List[RunEntry]:
+    """Find every saved dataset under `root`.
+
+    Args:
+        root: Directory to search, e.g. the harness' output directory.
+        include_shards: Also list the per-node outputs of sharded runs,
+            which are normally only looked at through their merge.
+
+    Returns:
+        Runs sorted by name. Runs saved without a run.json (see
+        `clockcheck.merge.write_run_info`) get the dataset's modification
+        time as their date and no config.
+    """
+    entries = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        if "state.json" not in filenames or "dataset_info.json" not in filenames:
+            continue
+        # The shards/ and tts/ working directories of a run aren't runs
+        dirnames[:] = []
+        if SHARD_INFO_NAME in filenames and not include_shards:
+            continue
+        config = None
+        info_path = os.path.join(dirpath, RUN_INFO_NAME)
+        if os.path.exists(info_path):
+            with open(info_path) as f:
+                info = json.load(f)
+            date, config = info["finished_at"], info.get("config")
+        else:
+            mtime = os.path.getmtime(os.path.join(dirpath, "dataset_info.json"))
+            date = datetime.fromtimestamp(mtime, timezone.utc).isoformat(
+                timespec="seconds"
+            )
+        name = os.path.relpath(dirpath, root)
+        entries.append(
+            RunEntry(name, dirpath, date, open_table(dirpath).num_rows, config)
+        )
+    return sorted(entries, key=lambda entry: entry.name)
+
+
+def scan_run(entry: RunEntry, wer_threshold: float = 0.1) -> pd.DataFrame:
+    """The grade columns of a run, one row per clip.
+
+    Sweeps are split by their 'run' column into '<name>/<run>'. Runs saved
+    without grades are graded here, which reads their text columns too.
+
+    Raises:
+        ValueError: If the run has neither grades nor what grading needs.
+    """
+    table = open_table(entry.path)
+    if "wer" not in table.column_names:
+        needed = {"transcribed_text", "hour", "minute"}
+        missing = needed - set(table.column_names)
+        if missing or not {"ground_truth", "text"} & set(table.column_names):
+            raise ValueError(f"{entry.name} can't be graded; missing {sorted(missing)}")
+        wanted = graders.GRADE_COLUMNS + graders.OPTIONAL_COLUMNS + ["run"]
+        present = [c for c in wanted if c in table.column_names]
+        batch = table.select(present).to_pydict()
+        grades = graders.grade_batch(batch, wer_threshold)
+        df = pd.DataFrame({**batch, **grades})
+    else:
+        df = table.select([c for c in SCAN_COLUMNS if c in table.column_names])
+        df = df.to_pandas()
+    if "run" in df.columns:
+        df["run"] = entry.name + "/" + df["run"].astype(str)
+    else:
+        df["run"] = entry.name
+    return df[[c for c in SCAN_COLUMNS if c in df.columns]]
+
+
+def _describe(config: Optional[dict], run: str) -> Dict[str, Optional[str]]:
+    """TTS and ASR model names of `run`, a run's name or one of its sweep runs."""
+    config = config or {}
+    model = config.get("model") or {}
+    for entry in config.get("sweep") or []:
+        overridden = {**model, **entry}
+        default = "-".join(
+            p for p in (overridden.get("model_id"), overridden.get("voice")) if p
+        )
+        if run in (entry.get("name"), default):
+            model = overridden
+            break
+    transcriber = config.get("transcriber") or {}
+    tts = "/".join(p for p in (model.get("model_id"), model.get("voice")) if p)
+    return {"tts": tts or None, "asr": transcriber.get("model_id")}
+
+
+def aggregate(
+    entries: List[RunEntry], wer_threshold: float = 0.1
+) -> tuple[pd.DataFrame, Dict[str, pd.DataFrame]]:
+    """Leaderboard and failure-rate heatmaps over `entries`.
+
+    Runs are scanned one at a time and reduced right away, so memory stays
+    at one run's grade columns plus the small aggregates.
+
+    Returns:
+        The leaderboard, one row per run sorted by failure rate, and
+        heatmaps keyed 'hour', 'minute' and 'hour_minute': failure rate per
+        run (rows) and hour (0-23), minute (0-59) or 'HH:MM' (columns).
+    """
+    boards, heatmaps = [], {"hour": [], "minute": [], "hour_minute": []}
+    for entry in entries:
+        try:
+            df = scan_run(entry, wer_threshold)
+        except ValueError as e:
+            print(f"Skipping {e}")
+            continue
+        if df.empty:
+            continue
+        df["failed"] = df["error"].notna()
+        grouped = df.groupby("run", sort=False)
+        board = grouped.agg(
+            rows=("failed", "size"),
+            failure_rate=("failed", "mean"),
+            time_accuracy=("time_correct", "mean"),
+            mean_wer=("wer", "mean"),
+            word_errors=("word_errors", "sum"),
+            ref_words=("ref_words", "sum"),
+        )
+        board["corpus_wer"] = board.pop("word_errors") / board.pop("ref_words").clip(
+            lower=1
+        )
+        errors = pd.crosstab(df["run"], df["error"]).reindex(
+            columns=graders.ERROR_CLASSES, fill_value=0
+        )
+        board = board.join(errors.div(board["rows"], axis=0).add_suffix("_rate"))
+        board = board.fillna({f"{c}_rate": 0.0 for c in graders.ERROR_CLASSES})
+        board["date"] = entry.date
+        described = [_describe(entry.config, run.split("/")[-1]) for run in board.index]
+        for key in ("tts", "asr"):
+            board[key] = [d[key] for d in described]
+        boards.append(board)
+
+        if {"hour", "minute"} <= set(df.columns):
+            df["hour_minute"] = (
+                df["hour"].map("{:02d}".format)
+                + ":"
+                + df["minute"].map("{:02d}".format)
+            )
+            for by in heatmaps:
+                heatmaps[by].append(
+                    df.pivot_table(
+                        index="run", columns=by, values="failed", aggfunc="mean"
+                    )
+                )
+        del df
+
+    if not boards:
+        return pd.DataFrame(), {by: pd.DataFrame() for by in heatmaps}
+    leaderboard = pd.concat(boards).sort_values(["failure_rate", "mean_wer"])
+    leading = ["rows", "failure_rate", "time_accuracy", "mean_wer", "corpus_wer"]
+    rest = [c for c in leaderboard.columns if c not in leading]
+    leaderboard = leaderboard[leading + rest]
+    maps = {
+        by: (
+            pd.concat(frames).sort_index(axis=1).reindex(leaderboard.index)
+            if frames
+            else pd.DataFrame()
+        )
+        for by, frames in heatmaps.items()
+    }
+    return leaderboard, maps
+
+
+__all__ = ["RunEntry", "aggregate", "index_runs", "open_table", "scan_run"]
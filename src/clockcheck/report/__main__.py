@@ -0,0 +1,62 @@
+import argparse
+import os
+import time
+
+import pandas as pd
+
+from clockcheck.report import aggregate, index_runs
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Index saved runs and build a leaderboard and error heatmaps"
+    )
+    parser.add_argument("root", help="Directory holding the runs, e.g. ./datasets")
+    parser.add_argument(
+        "--output",
+        help="Where to write the report (default: <root>/report)",
+    )
+    parser.add_argument(
+        "--include-shards",
+        action="store_true",
+        help="Also report the per-node outputs of sharded runs",
+    )
+    parser.add_argument(
+        "--wer-threshold",
+        type=float,
+        default=0.1,
+        help="For runs saved without grades (default: 0.1)",
+    )
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    entries = index_runs(args.root, args.include_shards)
+    if not entries:
+        raise SystemExit(f"No saved runs found under {args.root}")
+    index = pd.DataFrame(
+        [(e.name, e.date, e.rows) for e in entries], columns=["run", "date", "rows"]
+    )
+    print(index.to_string(index=False))
+
+    leaderboard, heatmaps = aggregate(entries, args.wer_threshold)
+    output = args.output or os.path.join(args.root, "report")
+    os.makedirs(output, exist_ok=True)
+    index.assign(config=[e.config for e in entries]).to_json(
+        os.path.join(output, "index.json"), orient="records", indent=2
+    )
+    leaderboard.to_csv(os.path.join(output, "leaderboard.csv"))
+    for by, heatmap in heatmaps.items():
+        heatmap.to_csv(os.path.join(output, f"failures_by_{by}.csv"))
+
+    with pd.option_context("display.width", 200, "display.precision", 3):
+        print()
+        print(leaderboard.drop(columns=["date"]).to_string())
+        if not heatmaps["hour"].empty:
+            print("\nFailure rate by hour")
+            print(heatmaps["hour"].to_string())
+    elapsed = time.perf_counter() - started
+    print(f"\n{len(entries)} runs in {elapsed:.1f}s; saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
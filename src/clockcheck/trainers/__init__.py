@@ -0,0 +1,3 @@
+from clockcheck.trainers.rewards import RewardBatch, RewardService
+
+__all__ = ["RewardBatch", "RewardService"]
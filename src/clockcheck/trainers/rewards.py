@@ -0,0 +1,166 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+import clockcheck.graders as graders
+import clockcheck.prefilter as prefilter
+import clockcheck.transcribers as transcribers
+from clockcheck.transcribers.contract import Transcriber
+from clockcheck.utils.audio import SAMPLE_RATE, resample
+from clockcheck.utils.config import PrefilterConfig, TranscriptionConfig
+from clockcheck.utils.executor import run_cpu
+from clockcheck.utils.resilience import Resilience
+
+
+class RewardBatch(NamedTuple):
+    rewards: List[float]
+    """One reward per clip, in submission order"""
+    grades: Dict[str, list]
+    """`graders.grade_batch` columns, plus 'transcribed_text'"""
+    latency_s: float
+    """Submission to rewards ready"""
+
+
+class RewardService:
+    """Scores GRPO rollouts by transcribing them and grading the spoken time.
+
+    The service runs its own event loop on a background thread. `submit`
+    hands it a whole rollout batch and returns right away with a future, so
+    the trainer can keep the GPU busy (e.g. computing reference log-probs)
+    while the clips are transcribed. Clips of a batch go to the
+    transcriber concurrently, paced by the usual limiter and retried by
+    `utils.resilience`; the transcriber, and its connection pool, lives as
+    long as the service.
+
+    A clip's reward is `time_weight * time_correct + wer_weight * (1 - WER)`,
+    with WER capped at 1. Clips the prefilter rejects, or that can't be
+    transcribed, score 0 without an ASR request.
+    """
+
+    def __init__(
+        self,
+        transcriber: Transcriber,
+        config: TranscriptionConfig,
+        sample_rate: int = SAMPLE_RATE,
+        time_weight: float = 1.0,
+        wer_weight: float = 0.5,
+        prefilter_config: Optional[PrefilterConfig] = None,
+    ):
+        """
+        Args:
+            transcriber: Backend used for every batch.
+            config: Its config; sets the request limiter and retry policy.
+            sample_rate: Sample rate of the submitted waveforms.
+            time_weight: Reward for saying the right time.
+            wer_weight: Reward for a perfect transcript, scaled by 1 - WER.
+            prefilter_config: Audio sanity bounds; clips outside them score
+                0 without being transcribed. Off by default.
+        """
+        self.transcriber = transcriber
+        self.sample_rate = sample_rate
+        self.time_weight = time_weight
+        self.wer_weight = wer_weight
+        self.prefilter_config = prefilter_config
+        self.limiter = transcribers.make_limiter_for(config)
+        self.resilience = Resilience(config.resilience)
+        self.latencies: List[float] = []
+
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self._loop.run_forever, name="clockcheck-rewards", daemon=True
+        )
+        self._thread.start()
+
+    @classmethod
+    def from_config(cls, config: TranscriptionConfig, **kwargs) -> "RewardService":
+        return cls(transcribers.from_config(config), config, **kwargs)
+
+    def submit(
+        self, waveforms: Sequence[np.ndarray], targets: Sequence[dict]
+    ) -> "Future[RewardBatch]":
+        """Start scoring a rollout batch.
+
+        Args:
+            waveforms: Mono float waveforms at `sample_rate`, e.g. every
+                completion of every prompt in the step.
+            targets: The prompt row each waveform was generated for, with
+                'hour', 'minute' and 'ground_truth' (or 'text'), as in
+                `clockcheck.prompts` datasets.
+
+        Returns:
+            A future for the batch's `RewardBatch`.
+        """
+        if len(waveforms) != len(targets):
+            raise ValueError("Need one target per waveform.")
+        return asyncio.run_coroutine_threadsafe(
+            self.score(list(waveforms), list(targets)), self._loop
+        )
+
+    def __call__(
+        self, waveforms: Sequence[np.ndarray], targets: Sequence[dict]
+    ) -> List[float]:
+        """Score a batch and wait for the rewards."""
+        return self.submit(waveforms, targets).result().rewards
+
+    async def score(
+        self, waveforms: List[np.ndarray], targets: List[dict]
+    ) -> RewardBatch:
+        """Transcribe and grade one batch on the service's loop."""
+        started = time.perf_counter()
+        rows = await asyncio.gather(
+            *(self._row(w, t) for w, t in zip(waveforms, targets))
+        )
+        batch = {
+            name: [row.get(name) for row in rows]
+            for name in graders.GRADE_COLUMNS + graders.OPTIONAL_COLUMNS
+            if any(name in row for row in rows)
+        }
+        grades = await run_cpu(graders.grade_batch, batch)
+        wer = np.minimum(np.asarray(grades["wer"], dtype=np.float64), 1.0)
+        rewards = self.time_weight * np.asarray(
+            grades["time_correct"], dtype=np.float64
+        )
+        rewards += self.wer_weight * (1.0 - wer)
+        failed = np.array([row.get("transcribed_text") is None for row in rows])
+        rewards[failed] = 0.0
+
+        latency = time.perf_counter() - started
+        self.latencies.append(latency)
+        grades["transcribed_text"] = batch["transcribed_text"]
+        return RewardBatch(rewards.tolist(), grades, latency)
+
+    async def _row(self, waveform: np.ndarray, target: dict) -> dict:
+        audio = np.asarray(waveform, dtype=np.float32).reshape(-1)
+        if self.sample_rate != SAMPLE_RATE:
+            audio = await run_cpu(resample, audio, self.sample_rate, SAMPLE_RATE)
+        row = {**target, "audio": audio}
+        if self.prefilter_config is not None:
+            row = await prefilter.check_row(row, self.prefilter_config)
+        result = await transcribers.transcribe_row(
+            self.transcriber, row, self.limiter, self.resilience
+        )
+        return result or {**row, "transcribed_text": None}
+
+    def report(self, last: int = 0) -> dict:
+        """Reward latency percentiles over every batch, or the `last` few."""
+        latencies = np.asarray(self.latencies[-last:] if last else self.latencies)
+        if not len(latencies):
+            return {"batches": 0}
+        p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+        return {
+            "batches": len(latencies),
+            "p50_s": float(p50),
+            "p90_s": float(p90),
+            "p99_s": float(p99),
+            "retries": sum(self.resilience.retries.values()),
+            "failed": self.resilience.failures,
+        }
+
+    def close(self) -> None:
+        """Stop the background loop. Pending batches are abandoned."""
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
@@ -1,22 +1,27 @@
 import asyncio
+from functools import partial
 from aiolimiter import AsyncLimiter
-from datasets import Dataset
-from tqdm.asyncio import tqdm_asyncio
-from typing import Dict, Type
+from typing import TYPE_CHECKING, Optional
 
+from clockcheck.transcribers.cache import CachedTranscriber
 from clockcheck.transcribers.contract import Transcriber
-from clockcheck.utils.config import ModelConfig
-from .openai_asr import OpenAITranscriber
-from .whisper_cpp import WhisperCppTranscriber
+from clockcheck.utils.audio import SAMPLE_RATE, open_audio, to_array
+from clockcheck.utils.config import ResilienceConfig, TranscriptionConfig
+from clockcheck.utils.executor import run_cpu
+from clockcheck.utils.limits import AdaptiveLimiter, make_limiter
+from clockcheck.utils.pool import map_pool
+from clockcheck.utils.resilience import Resilience
+from clockcheck.utils.shards import ShardWriter
+from clockcheck.utils import profiling, timing
+from clockcheck.registry import TRANSCRIBERS
 
-# Map transcriber types to their implementation classes
-_TRANSCRIBER_CLASSES: Dict[str, Type[Transcriber]] = {
-    "openai": OpenAITranscriber,
-    "whisper-cpp": WhisperCppTranscriber,
-}
+if TYPE_CHECKING:
+    from datasets import Dataset
 
+_SINGLE_ATTEMPT = ResilienceConfig(max_attempts=1, timeout_s=None)
 
-def from_config(config: ModelConfig) -> Transcriber:
+
+def from_config(config: TranscriptionConfig) -> Transcriber:
     """Create a Transcriber from configuration.
 
     Args:
@@ -26,61 +31,172 @@ def from_config(config: ModelConfig) -> Transcriber:
         An initialized Transcriber instance.
 
     Raises:
-        ValueError: If the transcriber type is not found.
+        ValueError: If the transcriber type is not registered.
     """
-    transcriber_class = _TRANSCRIBER_CLASSES.get(config.model_type)
-    if not transcriber_class:
-        raise ValueError(f"Unknown transcriber type: {config.model_type}")
-    return transcriber_class.from_config(config)
+    transcriber = TRANSCRIBERS.get(config.model_type).from_config(config)
+    if config.cache_dir:
+        return CachedTranscriber(transcriber, config)
+    return transcriber
+
+
+def report(transcriber: Transcriber) -> None:
+    """Print end-of-run statistics for `transcriber`, if it keeps any."""
+    if isinstance(transcriber, CachedTranscriber):
+        print(transcriber.cache.report("ASR cache"))
 
 
-async def run_ds(ds: Dataset, transcriber: Transcriber, config: ModelConfig) -> Dataset:
+async def transcribe_row(
+    transcriber: Transcriber,
+    item_data: dict,
+    limiter: Optional[asyncio.Semaphore | AsyncLimiter | AdaptiveLimiter] = None,
+    resilience: Optional[Resilience] = None,
+) -> dict | None:
+    """Transcribe the audio of a single dataset row.
+
+    Args:
+        transcriber: Transcriber to call.
+        item_data: Dataset row; must contain an 'audio' field.
+        limiter: Held around the transcriber request. Cache hits skip it.
+        resilience: Retry and hedging policy for the request; by default
+            it is made once, without a timeout.
+
+    Returns:
+        The row with an added 'transcribed_text' field and the `timing`
+        columns prefixed 'asr_', or None on failure. Rows the prefilter
+        rejected are returned untranscribed, with 'transcribed_text' None.
+    """
+    try:
+        audio_data = item_data.get("audio")
+        if audio_data is None:
+            print(f"Skipping item due to missing 'audio' field: {item_data}")
+            return None
+        if item_data.get("audio_reject_reason"):
+            return {
+                **item_data,
+                "transcribed_text": None,
+                **timing.RequestTimer().columns("asr"),
+            }
+        with timing.track() as timer:
+            audio_data = await run_cpu(to_array, audio_data)
+            text, key = None, None
+            if isinstance(transcriber, CachedTranscriber):
+                key = await transcriber.key_for(audio_data)
+                text = await transcriber.lookup(key)
+            if text is None:
+                # Encoded once, outside the limiter; every attempt, hedge and
+                # server gets the same bytes
+                upload = audio_data
+                if getattr(transcriber, "upload_sample_rate", None):
+                    upload = await transcriber.encode(audio_data)
+                if key is not None:
+                    call = partial(transcriber.transcribe_and_store, upload, key)
+                elif isinstance(upload, bytes):
+                    call = partial(transcriber.transcribe_upload, upload)
+                else:
+                    call = partial(transcriber.transcribe, audio_data)
+                resilience = resilience or Resilience(_SINGLE_ATTEMPT)
+                text = await resilience.call(call, limiter, transcriber.slot)
+        return {
+            **item_data,
+            "transcribed_text": text,
+            **timer.columns("asr", len(audio_data) / SAMPLE_RATE),
+        }
+    except Exception as e:
+        print(f"Failed to transcribe audio: {e}")
+        return None
+
+
+def make_limiter_for(
+    config: TranscriptionConfig,
+) -> asyncio.Semaphore | AsyncLimiter | AdaptiveLimiter:
+    """Build the request limiter described by the config's rate and concurrency."""
+    return make_limiter(
+        getattr(config, "requests_per_second", -1),
+        1.0,
+        "requests_per_second",
+        adaptive=config.concurrency == "adaptive",
+        max_concurrency=config.max_concurrency,
+        # "Sequential" means one request at a time per server
+        sequential_slots=len(config.base_urls or [None])
+        * config.per_endpoint_concurrency,
+    )
+
+
+async def run_ds(
+    ds: "Dataset",
+    transcriber: Transcriber,
+    config: TranscriptionConfig,
+    writer: Optional[ShardWriter] = None,
+) -> "Dataset":
     """Run transcription on a dataset using the given transcriber and config.
 
     Args:
         ds: Hugging Face Dataset containing audio data (expects 'audio' field).
         transcriber: Transcriber instance.
-        config: ModelConfig with rate limiting info.
+        config: TranscriptionConfig with rate limiting info.
+        writer: If given, finished rows are flushed to its shards as they
+            complete, rows it already holds are skipped, and the returned
+            dataset is loaded back from the shards.
 
     Returns:
-        Dataset with an added 'text' field containing transcriptions.
+        Dataset with an added 'transcribed_text' field containing transcriptions.
     """
-    actual_limiter: asyncio.Semaphore | AsyncLimiter
+    from datasets import Dataset
 
-    if getattr(config, "requests_per_second", -1) == -1:
-        actual_limiter = asyncio.Semaphore(1)
-    else:
-        if getattr(config, "requests_per_second", 0) <= 0:
-            raise ValueError(
-                "config.requests_per_second must be positive for rate limiting, or -1 for sequential."
-            )
-        actual_limiter = AsyncLimiter(config.requests_per_second, 1.0)
+    actual_limiter = make_limiter_for(config)
+    resilience = Resilience(config.resilience)
+    ds = open_audio(ds)
 
     async def process_item(item_data: dict) -> dict | None:
-        async with actual_limiter:
-            try:
-                audio_data = item_data.get("audio")
-                if audio_data is None:
-                    print(f"Skipping item due to missing 'audio' field: {item_data}")
-                    return None
-                text = await transcriber.transcribe(audio_data)
-                return {**item_data, "transcribed_text": text}
-            except Exception as e:
-                print(f"Failed to transcribe audio: {e}")
-                return None
-
-    jobs = [process_item(item) for item in ds]
-    if not jobs:
+        result = await transcribe_row(
+            transcriber, item_data, actual_limiter, resilience
+        )
+        if writer is not None and result is not None:
+            await writer.write(result)
+            return None
+        return result
+
+    if writer is not None:
+        items, total = writer.pending(ds)
+    else:
+        items, total = ds, len(ds)
+    if total == 0 and writer is None:
         print("Warning: Input dataset is empty.")
         return Dataset.from_list([])
 
-    results = await tqdm_asyncio.gather(*jobs, desc="Transcribing audio")
-    successful_results = [r for r in results if r is not None]
-
-    if not successful_results and len(jobs) > 0:
+    successful_results = []
+    async for result in map_pool(
+        process_item,
+        items,
+        config.max_concurrency,
+        ordered=writer is None,
+        desc="Transcribing audio",
+        total=total,
+    ):
+        if result is not None:
+            successful_results.append(result)
+    if isinstance(actual_limiter, AdaptiveLimiter):
+        print(actual_limiter.report("ASR"))
+    print(resilience.report("ASR"))
+
+    if writer is not None:
+        with profiling.stage("build"):
+            return await writer.load()
+
+    if not successful_results:
         print("Warning: All transcription jobs failed or returned None.")
 
-    return Dataset.from_list(successful_results)
+    with profiling.stage("build"):
+        return Dataset.from_list(successful_results)
 
 
-__all__ = ["Transcriber", "from_config", "run_ds"]
+__all__ = [
+    "TRANSCRIBERS",
+    "CachedTranscriber",
+    "Transcriber",
+    "from_config",
+    "make_limiter_for",
+    "report",
+    "run_ds",
+    "transcribe_row",
+]
@@ -0,0 +1,158 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import AsyncIterator, List, Optional
+
+import httpx
+
+from clockcheck.utils.resilience import classify
+
+
+@dataclass
+class Backend:
+    url: str
+    outstanding: int = 0
+    consecutive_failures: int = 0
+    ejected_until: float = 0.0
+
+    @property
+    def ejected(self) -> bool:
+        return time.monotonic() < self.ejected_until
+
+
+class EndpointPool:
+    """Least-outstanding-requests routing over a set of backend servers.
+
+    Each backend takes at most `max_per_backend` requests at once. A backend
+    that fails `max_failures` requests in a row is ejected for
+    `eject_seconds`; a background health check brings it back early once it
+    answers again. If every backend is ejected, requests wait for the first
+    one to come back rather than failing outright. A lone backend is never
+    ejected, since there is nowhere else to send its requests.
+
+    The health check only runs while a backend is ejected, so the pool
+    needs no shutdown.
+    """
+
+    def __init__(
+        self,
+        urls: List[str],
+        client: httpx.AsyncClient,
+        max_per_backend: int = 1,
+        max_failures: int = 3,
+        eject_seconds: float = 30.0,
+        health_interval: float = 5.0,
+    ):
+        if not urls:
+            raise ValueError("EndpointPool needs at least one endpoint.")
+        if max_per_backend <= 0:
+            raise ValueError("max_per_backend must be positive.")
+        self.backends = [Backend(url.rstrip("/")) for url in urls]
+        self.client = client
+        self.max_per_backend = max_per_backend
+        self.max_failures = max_failures
+        self.eject_seconds = eject_seconds
+        self.health_interval = health_interval
+        self._cond = asyncio.Condition()
+        self._health_task: Optional[asyncio.Task] = None
+        self._reserved: ContextVar[Optional[Backend]] = ContextVar(
+            "reserved", default=None
+        )
+
+    def _pick(self) -> Optional[Backend]:
+        candidates = [
+            b
+            for b in self.backends
+            if not b.ejected and b.outstanding < self.max_per_backend
+        ]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda b: b.outstanding)
+
+    async def acquire(self) -> Backend:
+        """Wait for and reserve the least loaded healthy backend."""
+        async with self._cond:
+            while (backend := self._pick()) is None:
+                # Wake up when a slot frees or the next ejection expires
+                wake_at = min(
+                    (b.ejected_until for b in self.backends if b.ejected),
+                    default=None,
+                )
+                timeout = None if wake_at is None else wake_at - time.monotonic()
+                try:
+                    await asyncio.wait_for(self._cond.wait(), timeout)
+                except TimeoutError:
+                    pass
+            backend.outstanding += 1
+            return backend
+
+    async def release(self, backend: Backend, ok: Optional[bool]) -> None:
+        """Return a backend's slot and record whether the backend was healthy.
+
+        `ok=None` (e.g. a cancelled request) records neither outcome.
+        """
+        async with self._cond:
+            backend.outstanding -= 1
+            if ok:
+                backend.consecutive_failures = 0
+            elif ok is False:
+                backend.consecutive_failures += 1
+                if (
+                    len(self.backends) > 1
+                    and backend.consecutive_failures >= self.max_failures
+                ):
+                    print(f"Ejecting {backend.url} for {self.eject_seconds:.0f}s")
+                    backend.ejected_until = time.monotonic() + self.eject_seconds
+                    if self._health_task is None:
+                        self._health_task = asyncio.create_task(self._health_loop())
+            self._cond.notify_all()
+
+    @asynccontextmanager
+    async def reserve(self) -> AsyncIterator[Backend]:
+        """Hold a backend for one request, made inside the block.
+
+        Only failures of the server itself (5xx, dropped connections) count
+        against it; a 4xx for a bad clip means it is up. Timeouts and
+        cancellations (e.g. a hedged duplicate answered first) count neither
+        way.
+        """
+        backend = await self.acquire()
+        token = self._reserved.set(backend)
+        ok: Optional[bool] = None
+        try:
+            yield backend
+            ok = True
+        except httpx.HTTPError as e:
+            if classify(e) in ("server", "connection"):
+                ok = False
+            elif isinstance(e, httpx.HTTPStatusError):
+                ok = True
+            raise
+        finally:
+            self._reserved.reset(token)
+            await self.release(backend, ok)
+
+    def reserved(self) -> Optional[Backend]:
+        """The backend the current task holds through `reserve`, if any."""
+        return self._reserved.get()
+
+    async def _health_loop(self) -> None:
+        while any(b.ejected for b in self.backends):
+            await asyncio.sleep(self.health_interval)
+            for backend in self.backends:
+                if not backend.ejected:
+                    continue
+                try:
+                    response = await self.client.get(backend.url, timeout=2.0)
+                    healthy = response.status_code < 500
+                except httpx.HTTPError:
+                    healthy = False
+                if healthy:
+                    async with self._cond:
+                        print(f"Restoring {backend.url}")
+                        backend.ejected_until = 0.0
+                        backend.consecutive_failures = 0
+                        self._cond.notify_all()
+        self._health_task = None
@@ -0,0 +1,86 @@
+import hashlib
+import numpy as np
+from typing import AsyncContextManager, Optional
+
+from clockcheck.registry import TRANSCRIBERS
+from clockcheck.transcribers.contract import Transcriber
+from clockcheck.utils.cache import DiskCache, cache_key
+from clockcheck.utils.config import TranscriptionConfig
+from clockcheck.utils.executor import run_cpu
+
+
+def audio_digest(audio: np.ndarray) -> str:
+    """Fast hash of a waveform's samples, quantized to 16 bits.
+
+    Quantizing first makes the digest stable across the storage formats
+    (FLAC, int16, float), which all round-trip the same 16-bit samples.
+    """
+    samples = np.asarray(audio)
+    if samples.dtype != np.int16:
+        samples = np.clip(np.round(samples * 32768.0), -32768, 32767).astype(np.int16)
+    return hashlib.blake2b(samples.astype("<i2").tobytes(), digest_size=16).hexdigest()
+
+
+class CachedTranscriber(Transcriber):
+    """Transcription cache in front of another Transcriber.
+
+    Entries are keyed on (model_type, model_id, decode_params, audio
+    digest), so rerunning over unchanged audio, e.g. to re-grade or after
+    swapping only the TTS voice for some rows, skips the ASR server.
+    Failed transcriptions are not cached.
+    """
+
+    def __init__(self, inner: Transcriber, config: TranscriptionConfig):
+        self.inner = inner
+        self.config = config
+        self.decode_params = inner.decode_params
+        self.upload_sample_rate = inner.upload_sample_rate
+        self.cache = DiskCache(
+            config.cache_dir, config.cache_max_mb * 1024 * 1024, suffix=".txt"
+        )
+
+    @classmethod
+    def from_config(cls, config: TranscriptionConfig) -> "CachedTranscriber":
+        return cls(TRANSCRIBERS.get(config.model_type).from_config(config), config)
+
+    async def key_for(self, audio: np.ndarray) -> str:
+        """Cache key for `audio`; hashing runs off the event loop."""
+        digest = await run_cpu(audio_digest, audio)
+        return cache_key(
+            self.config.model_type, self.config.model_id, self.decode_params, digest
+        )
+
+    async def lookup(self, key: str) -> Optional[str]:
+        """Return the cached transcription for `key` without calling the server."""
+        cached = await self.cache.get(key)
+        return None if cached is None else cached.decode("utf-8")
+
+    async def transcribe_and_store(self, audio: np.ndarray | bytes, key: str) -> str:
+        """Call the wrapped transcriber and store its output, skipping the lookup.
+
+        `audio` may be a waveform or, for transcribers that take them, an
+        upload made by `encode`.
+        """
+        if isinstance(audio, bytes):
+            text = await self.inner.transcribe_upload(audio)
+        else:
+            text = await self.inner.transcribe(audio)
+        if text is not None:
+            await self.cache.put(key, text.encode("utf-8"))
+        return text
+
+    def slot(self) -> AsyncContextManager:
+        return self.inner.slot()
+
+    async def encode(self, audio: np.ndarray) -> bytes:
+        return await self.inner.encode(audio)
+
+    async def transcribe_upload(self, payload: bytes) -> str:
+        return await self.inner.transcribe_upload(payload)
+
+    async def transcribe(self, audio: np.ndarray) -> str:
+        key = await self.key_for(audio)
+        cached = await self.lookup(key)
+        if cached is not None:
+            return cached
+        return await self.transcribe_and_store(audio, key)
@@ -1,9 +1,27 @@
 from abc import ABC, abstractmethod
+from contextlib import nullcontext
 import numpy as np
+from typing import AsyncContextManager, Optional
+
+from clockcheck.utils.audio import SAMPLE_RATE, decode, encode_wav
 from clockcheck.utils.config import ModelConfig
+from clockcheck.utils.executor import run_cpu
+from clockcheck.utils import timing
 
 
 class Transcriber(ABC):
+    decode_params: dict = {}
+    """
+    Request parameters that change the output for the same audio and model
+    (e.g. sampling temperature); part of the transcription cache key
+    """
+    upload_sample_rate: Optional[int] = None
+    """
+    Sample rate of the WAV uploads the backend takes. Transcribers that set
+    it get each clip encoded once by `transcribe_row`, which then reuses the
+    bytes for every retry, hedge and server through `transcribe_upload`
+    """
+
     @classmethod
     @abstractmethod
     def from_config(cls, config: ModelConfig) -> "Transcriber":
@@ -30,3 +48,33 @@ class Transcriber(ABC):
             str: The transcribed text.
         """
         pass
+
+    def slot(self) -> AsyncContextManager:
+        """
+        Reserve what a single request needs, e.g. a server to send it to.
+        The caller enters it around each attempt before the attempt is timed,
+        so waiting here counts as queueing rather than request time.
+        """
+        return nullcontext()
+
+    async def encode(self, audio: np.ndarray) -> bytes:
+        """Resample a 24kHz waveform and encode it as a WAV upload, off the event loop."""
+        with timing.phase("encode"):
+            return await run_cpu(
+                encode_wav, audio, SAMPLE_RATE, self.upload_sample_rate or SAMPLE_RATE
+            )
+
+    async def transcribe_upload(self, payload: bytes) -> str:
+        """
+        Transcribe audio already encoded by `encode`. Transcribers that set
+        `upload_sample_rate` override this to send `payload` as is; by
+        default it is decoded and passed to `transcribe`.
+
+        Args:
+            payload (bytes): WAV file at `upload_sample_rate`.
+
+        Returns:
+            str: The transcribed text.
+        """
+        audio = await run_cpu(decode, payload, SAMPLE_RATE)
+        return await self.transcribe(audio)
@@ -1,21 +1,39 @@
-from io import BytesIO
-from openai import AsyncOpenAI
+import httpx
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
 import numpy as np
-import soundfile as sf
 from typing import Optional
 
 from clockcheck.transcribers.contract import Transcriber
 from clockcheck.utils.config import TranscriptionConfig
+from clockcheck.utils import timing, transport
 
 
 class OpenAITranscriber(Transcriber):
+    upload_sample_rate = 24000
+
     def __init__(
         self,
         api_key: str,
         model: str = "gpt-4o-mini-transcribe",
         endpoint: Optional[str] = None,
+        client: Optional[httpx.AsyncClient] = None,
     ):
-        self.client = AsyncOpenAI(api_key=api_key, base_url=endpoint)
+        """
+        Args:
+            api_key: API key for the endpoint.
+            model: Transcription model name.
+            endpoint: Base URL; defaults to the first-party OpenAI API.
+            client: HTTP client to send requests with, e.g. a
+                `clockcheck.utils.transport.shared_client`.
+        """
+        self.client = AsyncOpenAI(
+            api_key=api_key,
+            base_url=endpoint,
+            http_client=client
+            or DefaultAsyncHttpxClient(event_hooks=timing.event_hooks()),
+            # Retries are counted and paced by clockcheck.utils.resilience
+            max_retries=0,
+        )
         self.model = model
 
     @classmethod
@@ -27,14 +45,18 @@ class OpenAITranscriber(Transcriber):
             else "gpt-4o-mini-transcribe"
         )
         endpoint = getattr(config, "base_url", None)
-        return cls(api_key=api_key, model=model, endpoint=endpoint)
+        return cls(
+            api_key=api_key,
+            model=model,
+            endpoint=endpoint,
+            client=transport.shared_client(config.transport, config.max_concurrency),
+        )
 
     async def transcribe(self, audio: np.ndarray) -> str:
-        pseudo_file = BytesIO()
-        sf.write(pseudo_file, audio, 24000, format="WAV")
-        pseudo_file.seek(0)
-        pseudo_file.name = "speech.wav"
+        return await self.transcribe_upload(await self.encode(audio))
+
+    async def transcribe_upload(self, payload: bytes) -> str:
         response = await self.client.audio.transcriptions.create(
-            model=self.model, file=pseudo_file
+            model=self.model, file=("speech.wav", payload, "audio/wav")
         )
         return response.text
@@ -1,63 +1,86 @@
-import asyncio
-from io import BytesIO
 import httpx
 import numpy as np
-import soundfile as sf
-import uuid
-from typing import Optional
+from typing import AsyncContextManager, List, Optional
 
+from clockcheck.transcribers.balancer import EndpointPool
 from clockcheck.transcribers.contract import Transcriber
-from clockcheck.utils.config import TranscriptionConfig
+from clockcheck.utils.config import TranscriptionConfig, TransportConfig
+from clockcheck.utils import transport
 
 
 class WhisperCppTranscriber(Transcriber):
+    decode_params = {"temperature": "0.5", "response_format": "json"}
+    upload_sample_rate = 16000
+
     def __init__(
         self,
         model: str = "whisper-1",
         endpoint: Optional[str] = None,
+        endpoints: Optional[List[str]] = None,
+        per_endpoint_concurrency: int = 1,
+        client: Optional[httpx.AsyncClient] = None,
     ):
-        self.client = httpx.AsyncClient()
+        """
+        Args:
+            model: Model name, kept for parity with other transcribers.
+            endpoint: Base URL of a single whisper-server.
+            endpoints: Base URLs of several whisper-servers; requests go to
+                the least loaded healthy one. Takes precedence over
+                `endpoint`.
+            per_endpoint_concurrency: Requests each server gets at once.
+                whisper-server handles requests serially, so 1 by default.
+            client: HTTP client to send requests with, e.g. a
+                `clockcheck.utils.transport.shared_client`; by default one
+                with a connection per concurrent request.
+        """
         self.model = model
+        self.endpoints = endpoints or [endpoint or "http://127.0.0.1:5000"]
+        self.client = client or transport.make_client(
+            TransportConfig(), len(self.endpoints) * per_endpoint_concurrency
+        )
+        self.pool = EndpointPool(
+            self.endpoints, self.client, max_per_backend=per_endpoint_concurrency
+        )
 
     @classmethod
     def from_config(cls, config: TranscriptionConfig) -> "WhisperCppTranscriber":
         model = config.model_id if getattr(config, "model_id", None) else "whisper-1"
         endpoint = getattr(config, "base_url", None)
-        return cls(model=model, endpoint=endpoint)
+        slots = len(config.base_urls or [endpoint]) * config.per_endpoint_concurrency
+        if config.resilience.hedge_percentile is not None and slots == 1:
+            print(
+                "Warning: hedge_percentile has no effect with a single "
+                "whisper-server slot; hedges would queue behind the original. "
+                "Add base_urls or raise per_endpoint_concurrency."
+            )
+        return cls(
+            model=model,
+            endpoint=endpoint,
+            endpoints=config.base_urls,
+            per_endpoint_concurrency=config.per_endpoint_concurrency,
+            client=transport.shared_client(config.transport, config.max_concurrency),
+        )
 
     async def transcribe(self, audio: np.ndarray) -> str:
-        pseudo_file = BytesIO()
-        import librosa
-
-        if hasattr(audio, "shape") and audio.shape[-1] > 0:
-            audio = librosa.resample(audio, orig_sr=24000, target_sr=16000)
-
-        sf.write(pseudo_file, audio, 16000, format="WAV")
-        pseudo_file.seek(0)
-        pseudo_file.name = f"{uuid.uuid4().hex}.wav"
-
-        endpoint = getattr(self, "endpoint", None) or "http://127.0.0.1:5000"
-        url = f"{endpoint.rstrip('/')}/inference"
-
-        files = {
-            "file": (pseudo_file.name, pseudo_file, "audio/wav"),
-        }
-        data = {
-            "temperature": "0.5",
-            "response_format": "json",
-        }
-
-        max_attempts = 4
-        delay = 1
-        for attempt in range(1, max_attempts + 1):
-            try:
-                response = await self.client.post(url, files=files, data=data)
-                response.raise_for_status()
-                result = response.json()
-                return result.get("text", "")
-            except (httpx.HTTPError, Exception) as e:
-                if attempt == max_attempts:
-                    print(f"Failed to transcribe audio: {e}")
-                    return None
-                await asyncio.sleep(delay)
-                delay *= 2  # Exponential backoff
+        return await self.transcribe_upload(await self.encode(audio))
+
+    def slot(self) -> AsyncContextManager:
+        """Reserve the least loaded healthy server for one request."""
+        return self.pool.reserve()
+
+    async def transcribe_upload(self, payload: bytes) -> str:
+        # Retries are up to the caller (see `clockcheck.utils.resilience`),
+        # which reserves a server for each through `slot`; each one may land
+        # on a different server
+        backend = self.pool.reserved()
+        if backend is None:
+            async with self.slot():
+                return await self.transcribe_upload(payload)
+
+        # bytes rather than a file object, so a retry resends it whole
+        files = {"file": ("audio.wav", payload, "audio/wav")}
+        response = await self.client.post(
+            f"{backend.url}/inference", files=files, data=dict(self.decode_params)
+        )
+        response.raise_for_status()
+        return response.json().get("text", "")
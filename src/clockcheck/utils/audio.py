@@ -0,0 +1,120 @@
+import io
+from functools import lru_cache
+from math import gcd
+import numpy as np
+import soundfile as sf
+from typing import TYPE_CHECKING, Literal
+
+if TYPE_CHECKING:
+    from datasets import Audio, Dataset, Sequence
+
+SAMPLE_RATE = 24000
+
+AudioFormat = Literal["flac", "pcm16"]
+
+
+def audio_feature(audio_format: AudioFormat) -> "Audio | Sequence":
+    """Dataset feature used to store the 'audio' column.
+
+    "flac" stores 16-bit FLAC through `datasets.Audio`, which is the most
+    compact. "pcm16" stores raw int16 samples, which read back into numpy
+    without a decode or copy.
+    """
+    from datasets import Audio, Sequence, Value
+
+    if audio_format == "flac":
+        return Audio(sampling_rate=SAMPLE_RATE)
+    return Sequence(Value("int16"))
+
+
+def encode_audio(audio: np.ndarray, audio_format: AudioFormat) -> dict | np.ndarray:
+    """Encode a 24kHz waveform for storage in the 'audio' column."""
+    audio = np.asarray(audio)
+    if audio_format == "flac":
+        with io.BytesIO() as buf:
+            sf.write(buf, audio, SAMPLE_RATE, format="FLAC", subtype="PCM_16")
+            return {"bytes": buf.getvalue(), "path": None}
+    if audio.dtype == np.int16:
+        return audio
+    # The exact inverse of `to_array`, so 16-bit sources round-trip
+    # losslessly, as they do through FLAC
+    return np.clip(np.round(audio * 32768), -32768, 32767).astype(np.int16)
+
+
+def to_array(audio) -> np.ndarray:
+    """Convert any stored or in-memory audio value to a float32 waveform.
+
+    Accepts float arrays or lists (the legacy format), int16 PCM, and
+    `datasets.Audio` values, either decoded (with 'array') or raw (with
+    'bytes').
+    """
+    if isinstance(audio, dict):
+        if audio.get("array") is not None:
+            return np.asarray(audio["array"], dtype=np.float32)
+        data, _ = sf.read(io.BytesIO(audio["bytes"]), dtype="float32")
+        return data
+    audio = np.asarray(audio)
+    if audio.dtype == np.int16:
+        return audio.astype(np.float32) / 32768.0
+    return audio.astype(np.float32, copy=False)
+
+
+@lru_cache(maxsize=8)
+def _resample_filter(up: int, down: int) -> np.ndarray:
+    # Same anti-aliasing FIR that scipy's resample_poly designs on every
+    # call; the harness only ever uses a couple of fixed ratios
+    from scipy.signal import firwin
+
+    max_rate = max(up, down)
+    return firwin(2 * 10 * max_rate + 1, 1.0 / max_rate, window=("kaiser", 5.0))
+
+
+def resample(audio: np.ndarray, orig_sr: int, target_sr: int) -> np.ndarray:
+    """Polyphase resampling with a cached filter per sample rate ratio."""
+    if orig_sr == target_sr or len(audio) == 0:
+        return audio
+    # scipy.signal takes about a second to import; most runs never resample
+    from scipy.signal import resample_poly
+
+    divisor = gcd(orig_sr, target_sr)
+    up, down = target_sr // divisor, orig_sr // divisor
+    resampled = resample_poly(
+        audio, up, down, axis=0, window=_resample_filter(up, down)
+    )
+    return resampled.astype(np.float32, copy=False)
+
+
+def decode(payload: bytes, target_sr: int = SAMPLE_RATE) -> np.ndarray:
+    """Decode an encoded audio file to a float32 waveform at `target_sr`."""
+    with io.BytesIO(payload) as buf:
+        data, samplerate = sf.read(buf, dtype="float32")
+    return resample(data, samplerate, target_sr)
+
+
+def encode_wav(
+    audio: np.ndarray, orig_sr: int = SAMPLE_RATE, target_sr: int = SAMPLE_RATE
+) -> bytes:
+    """Resample a waveform to `target_sr` and encode it as 16-bit WAV bytes."""
+    with io.BytesIO() as buf:
+        audio = resample(to_array(audio), orig_sr, target_sr)
+        sf.write(buf, audio, target_sr, format="WAV")
+        return buf.getvalue()
+
+
+def open_audio(ds: "Dataset") -> "Dataset":
+    """Prepare a predictions dataset for fast iteration over its audio.
+
+    FLAC audio is left undecoded so rows carry the compressed bytes and are
+    only decoded (by `to_array`) right before use. int16 audio is returned
+    as zero-copy numpy views.
+    """
+    from datasets import Audio, Sequence, Value
+
+    if "audio" not in ds.column_names:
+        return ds
+    feature = ds.features["audio"]
+    if isinstance(feature, Audio):
+        return ds.cast_column("audio", Audio(sampling_rate=SAMPLE_RATE, decode=False))
+    if isinstance(feature, Sequence) and feature.feature == Value("int16"):
+        return ds.with_format("numpy", columns=["audio"], output_all_columns=True)
+    return ds
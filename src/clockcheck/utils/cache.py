@@ -0,0 +1,116 @@
+import asyncio
+import hashlib
+import json
+import os
+import uuid
+from collections import OrderedDict
+
+
+def cache_key(*parts) -> str:
+    """Stable hex digest of JSON-serializable key parts."""
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DiskCache:
+    """Size-bounded on-disk LRU cache of byte blobs.
+
+    Each entry is one file named by its key. Recency is kept in memory and
+    mirrored to the file's mtime, which is bumped on every hit, so eviction
+    order survives across runs. When the total size exceeds `max_bytes`,
+    the least recently used entries are deleted. File reads, writes and
+    deletes run in worker threads, off the event loop.
+    """
+
+    def __init__(self, path: str, max_bytes: int, suffix: str = ""):
+        """
+        Args:
+            path: Directory holding the cache entries.
+            max_bytes: Maximum total size of all entries.
+            suffix: File extension for entries (e.g. ".flac").
+        """
+        if max_bytes <= 0:
+            raise ValueError("Cache size limit must be positive.")
+        self.path = path
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(path, exist_ok=True)
+        entries = []
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.name.endswith(suffix) and not entry.name.endswith(".tmp"):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, entry.name, stat.st_size))
+        # Least recently used first
+        self._sizes: OrderedDict[str, int] = OrderedDict(
+            (name, size) for _, name, size in sorted(entries)
+        )
+        self._total = sum(self._sizes.values())
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    @staticmethod
+    def _read(file: str) -> bytes:
+        with open(file, "rb") as f:
+            data = f.read()
+        os.utime(file)
+        return data
+
+    @staticmethod
+    def _write(file: str, data: bytes) -> None:
+        # Unique, so concurrent puts of one key don't share a temp file
+        tmp_path = f"{file}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, file)
+
+    def _remove(self, names: list[str]) -> None:
+        for name in names:
+            try:
+                os.remove(self._file(name))
+            except FileNotFoundError:
+                pass
+
+    async def get(self, key: str) -> bytes | None:
+        """Return the cached blob for `key`, or None on a miss."""
+        name = key + self.suffix
+        if name not in self._sizes:
+            self.misses += 1
+            return None
+        self._sizes.move_to_end(name)
+        try:
+            data = await asyncio.to_thread(self._read, self._file(name))
+        except FileNotFoundError:
+            # Deleted behind our back
+            self._total -= self._sizes.pop(name, 0)
+            self.misses += 1
+            return None
+        self.hits += 1
+        return data
+
+    async def put(self, key: str, data: bytes) -> None:
+        """Store `data` under `key`, evicting old entries if over the limit."""
+        name = key + self.suffix
+        await asyncio.to_thread(self._write, self._file(name), data)
+        self._total += len(data) - self._sizes.get(name, 0)
+        self._sizes[name] = len(data)
+        self._sizes.move_to_end(name)
+        evicted = []
+        while self._total > self.max_bytes:
+            old, size = self._sizes.popitem(last=False)
+            self._total -= size
+            evicted.append(old)
+        if evicted:
+            await asyncio.to_thread(self._remove, evicted)
+
+    def report(self, label: str) -> str:
+        """One-line summary of hit/miss counts for end-of-run logging."""
+        lookups = self.hits + self.misses
+        rate = self.hits / lookups if lookups else 0.0
+        return (
+            f"{label}: {self.hits} hits, {self.misses} misses ({rate:.1%} hit rate), "
+            f"{len(self._sizes)} entries, {self._total / 1e6:.1f} MB"
+        )
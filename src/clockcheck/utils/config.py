@@ -1,10 +1,82 @@
-from pydantic import BaseModel
-from typing import Literal, Optional
+import re
+from pydantic import BaseModel, field_validator
+from typing import Any, Literal, Optional
 import tomllib
 
+from clockcheck.registry import MODELS, TRANSCRIBERS
+
+
+class ResilienceConfig(BaseModel):
+    max_attempts: int = 4
+    """
+    Attempts per request, including the first. Only rate limits, 5xx,
+    timeouts and dropped connections are retried
+    """
+    backoff_s: float = 1.0
+    """
+    Upper bound of the first retry's random delay; doubles on every retry
+    """
+    max_backoff_s: float = 60.0
+    """
+    Cap on any retry delay, including one asked for with Retry-After
+    """
+    timeout_s: Optional[float] = 120.0
+    """
+    Per-attempt timeout on the backend call; waiting for a limiter slot
+    doesn't count
+    """
+    hedge_percentile: Optional[float] = None
+    """
+    If set (e.g. 95), send a duplicate of any request still running after
+    this percentile of the backend's recent latencies, and use whichever
+    answers first. Only helps when the backend has spare capacity, e.g.
+    several servers in base_urls or a hosted API; a single serial
+    whisper-server just queues the duplicate
+    """
+    hedge_min_samples: int = 20
+    """
+    Latencies to observe before hedging starts
+    """
+    hedge_max_in_flight: int = 2
+    """
+    Duplicates running at once. They skip the rate limiter, so that they
+    can start while the original holds its slot, and this bounds the
+    extra load; requests wait on the original while every slot is taken
+    """
+
+
+class TransportConfig(BaseModel):
+    max_connections: Optional[int] = None
+    """
+    Open connections per client; defaults to the backend's max_concurrency
+    """
+    max_keepalive_connections: Optional[int] = None
+    """
+    Idle connections kept open for reuse; defaults to max_connections, so
+    a busy run doesn't reconnect for every request
+    """
+    keepalive_expiry_s: float = 30.0
+    """
+    Idle connections older than this are closed
+    """
+    http2: bool = False
+    """
+    Negotiate HTTP/2 with servers that support it (e.g. OpenAI, not
+    whisper-server); needs the h2 package
+    """
+    connect_timeout_s: float = 10.0
+    read_timeout_s: Optional[float] = None
+    """
+    Longest wait for any read or write; by default only the per-attempt
+    resilience timeout applies
+    """
+
 
 class ModelConfig(BaseModel):
-    model_type: Literal["huggingface", "openai"]
+    model_type: str
+    """
+    A name registered in `clockcheck.registry.MODELS`, e.g. "openai"
+    """
     base_url: Optional[str] = None
     """
     Defaults to first-party OpenAI endpoint
@@ -15,19 +87,152 @@ class ModelConfig(BaseModel):
     """
     If not set, generation will be in serial
     """
+    concurrency: Literal["fixed", "adaptive"] = "fixed"
+    """
+    "adaptive" keeps raising in-flight requests while throughput improves and
+    backs off on 429s, 5xx and latency spikes. A positive rate limit still applies.
+    """
+    max_concurrency: int = 64
+    """
+    Number of workers, i.e. the upper bound on in-flight requests
+    """
+    cache_dir: Optional[str] = None
+    """
+    If set, synthesized audio is cached here, keyed on endpoint, model, voice and text
+    """
+    cache_max_mb: int = 2048
+    """
+    Least recently used entries are evicted past this size
+    """
+    stream: bool = False
+    """
+    Request raw 24 kHz PCM and read it as it streams in (openai only). Falls
+    back to WAV for servers that don't support it
+    """
+    resilience: ResilienceConfig = ResilienceConfig()
+    """
+    Retries, timeouts and hedging for TTS requests
+    """
+
+    @field_validator("model_type")
+    @classmethod
+    def _registered(cls, value: str) -> str:
+        if value not in MODELS.names():
+            raise ValueError(
+                f"Unknown model type {value!r}; available: {MODELS.names()}"
+            )
+        return value
 
 
 class TranscriptionConfig(BaseModel):
-    model_type: Literal["openai", "whisper-cpp"]
+    model_type: str
+    """
+    A name registered in `clockcheck.registry.TRANSCRIBERS`, e.g. "whisper-cpp"
+    """
     base_url: Optional[str] = None
     """
     Defaults to first-party OpenAI endpoint
     """
+    base_urls: Optional[list[str]] = None
+    """
+    Several servers to spread requests across (whisper-cpp only); overrides base_url
+    """
+    per_endpoint_concurrency: int = 1
+    """
+    Requests each server in base_urls handles at once
+    """
     model_id: Optional[str]
     requests_per_second: int = -1
     """
     If not set, generation will be in serial
     """
+    concurrency: Literal["fixed", "adaptive"] = "fixed"
+    """
+    "adaptive" keeps raising in-flight requests while throughput improves and
+    backs off on 429s, 5xx and latency spikes. A positive rate limit still applies.
+    """
+    max_concurrency: int = 64
+    """
+    Number of workers, i.e. the upper bound on in-flight requests
+    """
+    cache_dir: Optional[str] = None
+    """
+    If set, transcriptions are cached here, keyed on the audio samples,
+    transcriber type, model and decode parameters
+    """
+    cache_max_mb: int = 256
+    """
+    Least recently used entries are evicted past this size
+    """
+    resilience: ResilienceConfig = ResilienceConfig()
+    """
+    Retries, timeouts and hedging for transcription requests
+    """
+    transport: TransportConfig = TransportConfig()
+    """
+    Connection pooling, keep-alive, HTTP/2 and socket timeouts
+    """
+
+    @field_validator("model_type")
+    @classmethod
+    def _registered(cls, value: str) -> str:
+        if value not in TRANSCRIBERS.names():
+            raise ValueError(
+                f"Unknown transcriber type {value!r}; available: {TRANSCRIBERS.names()}"
+            )
+        return value
+
+
+class GraderConfig(BaseModel):
+    enabled: bool = True
+    wer_threshold: float = 0.1
+    """
+    Rows with a WER above this are classified into the error taxonomy
+    """
+
+
+class PrefilterConfig(BaseModel):
+    enabled: bool = False
+    """
+    Check every clip's duration, level and clipping before transcription, and
+    skip ASR for clips outside these bounds, grading them as "bad_audio"
+    """
+    min_duration_s: float = 0.3
+    max_duration_s: float = 20.0
+    silence_db: float = -45.0
+    """
+    20 ms frames with an RMS level below this (dBFS) count as silence
+    """
+    max_silence_ratio: float = 0.95
+    """
+    Reject clips with a larger fraction of silent frames
+    """
+    max_clip_ratio: float = 0.01
+    """
+    Reject clips with a larger fraction of samples at full scale
+    """
+
+
+class EarlyStopConfig(BaseModel):
+    enabled: bool = False
+    """
+    Visit rows in an order stratified by hour, minute and AM/PM, grade them
+    as they finish, and stop once the estimates are tight enough
+    """
+    ci_width: float = 0.05
+    """
+    Stop when the confidence interval on the failure rate and on every error
+    class's rate is at most this wide (full width, e.g. 0.05 = +/-2.5 points)
+    """
+    confidence: float = 0.95
+    min_rows: int = 100
+    """
+    Never stop before this many rows have been graded
+    """
+    seed: int = 0
+    """
+    Seed for the sampling order; keep it fixed to --resume a run
+    """
 
 
 class Config(BaseModel):
@@ -37,9 +242,66 @@ class Config(BaseModel):
     Can be HuggingFace dataset ID or local path
     """
     output_dataset_path: Optional[str] = "./datasets/dataset_pred"
+    pipeline: Literal["staged", "streaming"] = "staged"
+    """
+    "staged" runs all TTS, then all ASR. "streaming" transcribes each clip
+    as soon as it is synthesized.
+    """
+    queue_size: int = 32
+    """
+    Maximum number of clips in flight between TTS and ASR in streaming mode
+    """
+    audio_format: Literal["flac", "pcm16"] = "flac"
+    """
+    Storage for the output 'audio' column: 16-bit FLAC via `datasets.Audio`
+    (smallest), or raw int16 PCM (zero-copy numpy reads)
+    """
+    cpu_executor: Literal["thread", "process"] = "thread"
+    """
+    Pool used for audio decoding, encoding and resampling, off the event loop
+    """
+    cpu_workers: Optional[int] = None
+    """
+    Size of the CPU pool; defaults to the executor's own default
+    """
+    shard_size: int = 256
+    """
+    Rows per output shard; bounds how many finished rows are held in memory
+    """
 
     model: ModelConfig
     transcriber: TranscriptionConfig
+    grader: GraderConfig = GraderConfig()
+    prefilter: PrefilterConfig = PrefilterConfig()
+    early_stop: EarlyStopConfig = EarlyStopConfig()
+    sweep: Optional[list[dict[str, Any]]] = None
+    """
+    Run several TTS setups in one process: each entry overrides fields of
+    [model] (e.g. `{ voice = "sky" }`) and may set a `name`. All of them feed
+    one shared transcriber, and results land in one dataset with a 'run' column
+    """
+
+    def model_runs(self) -> list[tuple[str, ModelConfig]]:
+        """The (run name, model config) pairs to evaluate.
+
+        Without `sweep` this is just [model], named after its voice or model.
+        """
+        entries = self.sweep or [{}]
+        runs: list[tuple[str, ModelConfig]] = []
+        for entry in entries:
+            overrides = {k: v for k, v in entry.items() if k != "name"}
+            model = ModelConfig(**{**self.model.model_dump(), **overrides})
+            name = entry.get("name") or "-".join(
+                part for part in (model.model_id, model.voice) if part
+            )
+            # Run names become directory names
+            name = re.sub(r"[^A-Za-z0-9_.-]+", "_", name or model.model_type)
+            runs.append((name, model))
+        names = [name for name, _ in runs]
+        duplicates = sorted({n for n in names if names.count(n) > 1})
+        if duplicates:
+            raise ValueError(f"Sweep run names must be unique; repeated: {duplicates}")
+        return runs
 
     @classmethod
     def from_toml(cls, file_path: str) -> "Config":
@@ -0,0 +1,61 @@
+import asyncio
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Literal, Optional, TypeVar
+
+from clockcheck.utils import profiling
+
+R = TypeVar("R")
+
+ExecutorKind = Literal["thread", "process"]
+
+_executor: Optional[Executor] = None
+
+
+def configure(kind: ExecutorKind = "thread", max_workers: Optional[int] = None) -> None:
+    """Set up the executor shared by all backends for CPU-bound audio work.
+
+    Threads are enough for numpy, soundfile and scipy, which release the GIL
+    for the heavy lifting; a process pool isolates the event loop completely
+    at the cost of pickling waveforms.
+
+    Args:
+        kind: "thread" or "process".
+        max_workers: Pool size; defaults to the executor's own default.
+    """
+    global _executor
+    shutdown()
+    if kind == "process":
+        _executor = ProcessPoolExecutor(max_workers=max_workers)
+    else:
+        _executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="clockcheck-cpu"
+        )
+
+
+def shutdown() -> None:
+    """Shut down the shared executor, if one was configured."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+async def run_cpu(fn: Callable[..., R], *args, **kwargs) -> R:
+    """Run a CPU-bound function off the event loop on the shared executor.
+
+    Functions must be importable module-level callables when a process pool
+    is configured. Falls back to a default thread pool if `configure` was
+    never called. While a profile is running, each call is timed for it.
+    """
+    if _executor is None:
+        configure()
+    loop = asyncio.get_running_loop()
+    if not profiling.enabled():
+        return await loop.run_in_executor(_executor, partial(fn, *args, **kwargs))
+    measured = partial(
+        profiling.measure, fn, args, kwargs, profiling.cprofile_enabled()
+    )
+    result, sample = await loop.run_in_executor(_executor, measured)
+    profiling.record(fn, sample)
+    return result
@@ -0,0 +1,184 @@
+import asyncio
+import time
+from aiolimiter import AsyncLimiter
+from typing import Optional
+
+
+def is_overload(exc: BaseException) -> bool:
+    """Whether a request failure means the backend is overloaded.
+
+    True for timeouts and for HTTP 429 / 5xx responses from either the
+    OpenAI client (`exc.status_code`) or httpx (`exc.response.status_code`).
+    """
+    if isinstance(exc, TimeoutError) or "Timeout" in type(exc).__name__:
+        return True
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status == 429 or (isinstance(status, int) and status >= 500)
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limiter driven by observed throughput and latency.
+
+    Once per window (roughly `limit` completed requests) the limit is raised
+    by one if throughput improved and latency stayed within
+    `latency_tolerance` times the best latency seen so far. It is halved on
+    a 429, 5xx or timeout, or when window latency exceeds that bound. When
+    throughput stops improving the limit holds, probing one step higher
+    every few windows in case the backend has recovered.
+
+    Use it like a semaphore: `async with limiter: ...`.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 64,
+        min_concurrency: int = 1,
+        initial: int = 1,
+        latency_tolerance: float = 2.0,
+        rate: Optional[AsyncLimiter] = None,
+    ):
+        """
+        Args:
+            max_concurrency: Upper bound on requests in flight.
+            min_concurrency: Lower bound on requests in flight.
+            initial: Starting limit.
+            latency_tolerance: Back off once window latency exceeds this
+                multiple of the lowest window latency seen.
+            rate: Optional fixed rate cap applied on top of the limit.
+        """
+        if not 1 <= min_concurrency <= initial <= max_concurrency:
+            raise ValueError(
+                "Adaptive concurrency bounds must satisfy 1 <= min <= initial <= max."
+            )
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min_concurrency
+        self.limit = initial
+        self.latency_tolerance = latency_tolerance
+        self.rate = rate
+        self.peak = initial
+
+        self._in_flight = 0
+        self._cond = asyncio.Condition()
+        self._starts: dict[asyncio.Task, float] = {}
+        self._window_start = time.perf_counter()
+        self._window_latencies: list[float] = []
+        self._best_latency = float("inf")
+        self._best_throughput = 0.0
+        self._stale_windows = 0
+        self._last_decrease = 0.0
+
+    async def __aenter__(self) -> "AdaptiveLimiter":
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+        if self.rate is not None:
+            try:
+                await self.rate.acquire()
+            except BaseException:
+                async with self._cond:
+                    self._in_flight -= 1
+                    self._cond.notify_all()
+                raise
+        self._starts[asyncio.current_task()] = time.perf_counter()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        start = self._starts.pop(asyncio.current_task())
+        latency = time.perf_counter() - start
+        if exc is not None and is_overload(exc):
+            # Requests sent before the last backoff already saw the old
+            # limit, so a burst of concurrent failures only halves it once
+            if start >= self._last_decrease:
+                self._decrease()
+        elif exc is None:
+            self._record(latency)
+        async with self._cond:
+            self._in_flight -= 1
+            self._cond.notify_all()
+
+    def _record(self, latency: float) -> None:
+        self._window_latencies.append(latency)
+        if len(self._window_latencies) < self.limit:
+            return
+
+        now = time.perf_counter()
+        elapsed = max(now - self._window_start, 1e-9)
+        throughput = len(self._window_latencies) / elapsed
+        window_latency = sorted(self._window_latencies)[
+            len(self._window_latencies) // 2
+        ]
+        self._best_latency = min(self._best_latency, window_latency)
+        self._window_start = now
+        self._window_latencies = []
+
+        if window_latency > self.latency_tolerance * self._best_latency:
+            self._decrease()
+        elif throughput > 1.05 * self._best_throughput or self._stale_windows >= 3:
+            self._best_throughput = max(self._best_throughput, throughput)
+            self._stale_windows = 0
+            self._set_limit(self.limit + 1)
+        else:
+            self._stale_windows += 1
+
+    def _decrease(self) -> None:
+        self._last_decrease = time.perf_counter()
+        self._set_limit(max(self.min_concurrency, self.limit // 2))
+        self._best_throughput = 0.0
+        self._stale_windows = 0
+        self._window_start = time.perf_counter()
+        self._window_latencies = []
+
+    def _set_limit(self, limit: int) -> None:
+        self.limit = min(self.max_concurrency, limit)
+        self.peak = max(self.peak, self.limit)
+
+    def report(self, label: str) -> str:
+        """One-line summary of the settled concurrency for end-of-run logging."""
+        return (
+            f"{label} adaptive concurrency settled at {self.limit} "
+            f"(peak {self.peak}, max {self.max_concurrency})"
+        )
+
+
+def make_limiter(
+    rate: int,
+    period: float,
+    name: str,
+    adaptive: bool = False,
+    max_concurrency: int = 64,
+    sequential_slots: int = 1,
+) -> asyncio.Semaphore | AsyncLimiter | AdaptiveLimiter:
+    """Build the limiter used to pace requests to a backend.
+
+    Args:
+        rate: Maximum number of requests per `period`, or -1 for sequential.
+        period: Length of the rate window in seconds.
+        name: Name of the config field, used in error messages.
+        adaptive: Use an `AdaptiveLimiter`. A positive `rate` still caps the
+            request rate; -1 leaves it uncapped.
+        max_concurrency: Upper bound for the adaptive limiter.
+        sequential_slots: Requests allowed at once when `rate` is -1, e.g.
+            one per server when a backend spreads over several.
+
+    Returns:
+        `asyncio.Semaphore(sequential_slots)` for sequential processing, an `AsyncLimiter`
+        for a fixed rate, or an `AdaptiveLimiter`. All support `async with`.
+
+    Raises:
+        ValueError: If `rate` is neither -1 nor positive.
+    """
+    if rate != -1 and rate <= 0:
+        raise ValueError(
+            f"config.{name} must be positive for rate limiting, or -1 for sequential."
+        )
+    if adaptive:
+        return AdaptiveLimiter(
+            max_concurrency=max_concurrency,
+            rate=AsyncLimiter(rate, period) if rate != -1 else None,
+        )
+    if rate == -1:
+        # Sequential processing (one at a time, as fast as possible)
+        return asyncio.Semaphore(sequential_slots)
+    return AsyncLimiter(rate, period)
@@ -0,0 +1,89 @@
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, Iterable, Optional, TypeVar
+from tqdm.asyncio import tqdm
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_DONE = object()
+
+
+async def map_pool(
+    fn: Callable[[T], Awaitable[R]],
+    items: Iterable[T],
+    num_workers: int,
+    ordered: bool = False,
+    desc: Optional[str] = None,
+    total: Optional[int] = None,
+) -> AsyncIterator[R]:
+    """Apply `fn` to `items` with a fixed pool of workers, yielding results.
+
+    Workers pull from `items` lazily, so only about `num_workers` items are
+    materialized at once no matter how long the iterable is. Results are
+    yielded as they finish, or in input order if `ordered` is set; either
+    way at most `2 * num_workers` results are buffered, so a slow consumer
+    applies backpressure to the workers.
+
+    Args:
+        fn: Coroutine function to apply to each item.
+        items: Iterable of inputs, consumed lazily.
+        num_workers: Number of concurrent workers.
+        ordered: Yield results in input order instead of completion order.
+        desc: Progress bar label.
+        total: Number of items, for the progress bar.
+
+    Yields:
+        `fn(item)` for every item.
+    """
+    if num_workers <= 0:
+        raise ValueError("num_workers must be positive.")
+
+    iterator = iter(enumerate(items))
+    window = asyncio.Semaphore(2 * num_workers)
+    results: asyncio.Queue = asyncio.Queue()
+    progress = tqdm(total=total, desc=desc)
+
+    async def worker():
+        while True:
+            await window.acquire()
+            try:
+                index, item = next(iterator)
+            except StopIteration:
+                window.release()
+                return
+            result = await fn(item)
+            del item
+            progress.update(1)
+            await results.put((index, result))
+
+    async def run_workers():
+        try:
+            # A failing worker cancels the others
+            async with asyncio.TaskGroup() as group:
+                for _ in range(num_workers):
+                    group.create_task(worker())
+        finally:
+            await results.put((None, _DONE))
+
+    runner = asyncio.create_task(run_workers())
+    try:
+        pending: dict[int, R] = {}
+        next_index = 0
+        while True:
+            index, result = await results.get()
+            if result is _DONE:
+                break
+            if not ordered:
+                window.release()
+                yield result
+                continue
+            pending[index] = result
+            while next_index in pending:
+                window.release()
+                yield pending.pop(next_index)
+                next_index += 1
+        # Surface any exception raised by a worker
+        await runner
+    finally:
+        runner.cancel()
+        progress.close()
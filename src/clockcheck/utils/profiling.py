@@ -0,0 +1,255 @@
+"""Low-overhead run profiling for `harness.py --profile`.
+
+Like `timing`, the helpers here are module-level and do nothing unless a
+profile is active, so stages can be marked anywhere without threading a
+profiler through every call:
+
+- `stage(name)` adds wall and CPU time to a named stage;
+- an event-loop lag monitor wakes up on a timer and records how late it
+  was, which is how long something blocked the loop;
+- `run_cpu` reports every CPU-bound helper call (resampling, encoding,
+  decoding) through `measure`, and with `cprofile` the calls are also
+  sampled with cProfile.
+"""
+
+import asyncio
+import cProfile
+import json
+import os
+import pstats
+import resource
+import statistics
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+
+
+class _Stats:
+    # pstats.Stats.add() accepts anything with create_stats() and .stats
+    def __init__(self, stats: dict):
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+class Profiler:
+    def __init__(self, cprofile: bool = False, lag_interval: float = 0.1):
+        """
+        Args:
+            cprofile: Also run every `run_cpu` call under cProfile. Costs
+                noticeably more than the rest; off by default.
+            lag_interval: Seconds between event-loop lag samples.
+        """
+        self.cprofile = cprofile
+        self.lag_interval = lag_interval
+        self.stages: Dict[str, Dict[str, float]] = {}
+        self.helpers: Dict[str, Dict[str, float]] = {}
+        self.lags: List[float] = []
+        self.pstats: Optional[pstats.Stats] = None
+        self._started = (time.perf_counter(), time.process_time())
+        self._monitor: Optional[asyncio.Task] = None
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            totals = self.stages.setdefault(
+                name, {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0}
+            )
+            totals["calls"] += 1
+            totals["wall_s"] += time.perf_counter() - wall
+            totals["cpu_s"] += time.process_time() - cpu
+
+    def record(self, name: str, sample: dict) -> None:
+        """Add one helper call measured by `measure`."""
+        totals = self.helpers.setdefault(
+            name, {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0}
+        )
+        totals["calls"] += 1
+        totals["wall_s"] += sample["wall_s"]
+        totals["cpu_s"] += sample["cpu_s"]
+        if sample.get("pstats"):
+            if self.pstats is None:
+                self.pstats = pstats.Stats()
+            self.pstats.add(_Stats(sample["pstats"]))
+
+    async def _monitor_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.lag_interval
+            await asyncio.sleep(self.lag_interval)
+            self.lags.append(max(loop.time() - expected, 0.0))
+
+    def start_monitor(self) -> None:
+        """Start sampling lag on the running event loop."""
+        self._monitor = asyncio.get_running_loop().create_task(self._monitor_loop())
+
+    def stop_monitor(self) -> None:
+        if self._monitor is not None:
+            self._monitor.cancel()
+            self._monitor = None
+
+    def summary(self, top: int = 25) -> dict:
+        """Everything recorded so far, as JSON-serializable data."""
+        wall = time.perf_counter() - self._started[0]
+        cpu = time.process_time() - self._started[1]
+        lag: dict = {"interval_s": self.lag_interval, "samples": len(self.lags)}
+        if len(self.lags) >= 2:
+            cuts = statistics.quantiles(self.lags, n=100, method="inclusive")
+            lag.update(
+                {
+                    "p50_s": cuts[49],
+                    "p90_s": cuts[89],
+                    "p99_s": cuts[98],
+                    "max_s": max(self.lags),
+                    "over_100ms": sum(lag > 0.1 for lag in self.lags),
+                }
+            )
+        summary = {
+            "process": {
+                "wall_s": wall,
+                "cpu_s": cpu,
+                # ru_maxrss is in KiB on Linux and bytes on macOS
+                "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+                / (1024 * 1024 if sys.platform == "darwin" else 1024),
+            },
+            "stages": self.stages,
+            "loop_lag": lag,
+            "cpu_helpers": self.helpers,
+        }
+        if self.pstats is not None:
+            entries = sorted(
+                self.pstats.stats.items(), key=lambda item: item[1][3], reverse=True
+            )
+            summary["cprofile_top"] = [
+                {
+                    "function": f"{file}:{line}({name})",
+                    "calls": calls,
+                    "tottime_s": tottime,
+                    "cumtime_s": cumtime,
+                }
+                for (file, line, name), (_, calls, tottime, cumtime, _) in entries[:top]
+            ]
+        return summary
+
+
+_active: Optional[Profiler] = None
+# Only one cProfile can run per process at a time
+_cprofile_lock = threading.Lock()
+
+
+def start(cprofile: bool = False, lag_interval: float = 0.1) -> Profiler:
+    """Start profiling; call from inside the event loop to monitor it."""
+    global _active
+    _active = Profiler(cprofile, lag_interval)
+    _active.start_monitor()
+    return _active
+
+
+def enabled() -> bool:
+    return _active is not None
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Add this block's wall and CPU time to stage `name`, if profiling."""
+    if _active is None:
+        yield
+        return
+    with _active.stage(name):
+        yield
+
+
+def measure(fn: Callable, args: tuple, kwargs: dict, cprofile: bool):
+    """Call `fn` and time it; runs on the executor, in a thread or process.
+
+    With `cprofile`, the call runs under cProfile unless another call in the
+    same process already is, so concurrent helpers are sampled rather than
+    serialized.
+
+    Returns:
+        The result and a sample for `Profiler.record`. CPU time is the
+        calling thread's, so concurrent helpers don't count each other.
+    """
+    wall, cpu = time.perf_counter(), time.thread_time()
+    profile = None
+    if cprofile and _cprofile_lock.acquire(blocking=False):
+        try:
+            profile = cProfile.Profile()
+            result = profile.runcall(fn, *args, **kwargs)
+            profile.create_stats()
+        finally:
+            _cprofile_lock.release()
+    else:
+        result = fn(*args, **kwargs)
+    sample = {
+        "wall_s": time.perf_counter() - wall,
+        "cpu_s": time.thread_time() - cpu,
+        "pstats": profile.stats if profile is not None else None,
+    }
+    return result, sample
+
+
+def record(fn: Callable, sample: dict) -> None:
+    if _active is not None:
+        _active.record(getattr(fn, "__qualname__", repr(fn)), sample)
+
+
+def cprofile_enabled() -> bool:
+    return _active is not None and _active.cprofile
+
+
+def finish(output_path: str) -> dict:
+    """Stop profiling and save the profile with the run's outputs.
+
+    Writes 'profile.json' under `output_path`, next to grades.json and
+    latency.json, plus 'cpu.pstats' (readable with `python -m pstats`) when
+    cProfile was on.
+
+    Returns:
+        The profile summary.
+    """
+    global _active
+    if _active is None:
+        raise RuntimeError("Profiling was not started.")
+    profiler, _active = _active, None
+    profiler.stop_monitor()
+    os.makedirs(output_path, exist_ok=True)
+    summary = profiler.summary()
+    if profiler.pstats is not None:
+        summary["cprofile_path"] = os.path.join(output_path, "cpu.pstats")
+        profiler.pstats.dump_stats(summary["cprofile_path"])
+    with open(os.path.join(output_path, "profile.json"), "w") as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+def format_summary(summary: dict) -> str:
+    """Render the stage, lag and helper tables for the console."""
+    lines = [
+        f"Profile: {summary['process']['wall_s']:.1f}s wall, "
+        f"{summary['process']['cpu_s']:.1f}s CPU, "
+        f"{summary['process']['max_rss_mb']:.0f} MB peak RSS"
+    ]
+    for title, rows in (
+        ("stage", summary["stages"]),
+        ("CPU helper", summary["cpu_helpers"]),
+    ):
+        for name, totals in sorted(rows.items(), key=lambda r: -r[1]["wall_s"]):
+            lines.append(
+                f"  {title} {name:<20} {totals['wall_s']:8.2f}s wall "
+                f"{totals['cpu_s']:8.2f}s CPU  ({totals['calls']} calls)"
+            )
+    lag = summary["loop_lag"]
+    if "p50_s" in lag:
+        lines.append(
+            f"  event loop lag  p50 {lag['p50_s'] * 1000:.1f}ms  "
+            f"p99 {lag['p99_s'] * 1000:.1f}ms  max {lag['max_s'] * 1000:.1f}ms  "
+            f"({lag['over_100ms']} of {lag['samples']} samples over 100ms)"
+        )
+    return "\n".join(lines)
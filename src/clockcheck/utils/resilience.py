@@ -0,0 +1,233 @@
+"""Retries, timeouts and hedged requests for TTS and ASR backend calls.
+
+`Resilience.call` wraps one backend call (e.g. `model.generate(text)`).
+Every attempt takes its own slot from the backend's rate limiter, so
+retries count against the rate limit and an `AdaptiveLimiter` sees every
+429 and timeout. Failures are classified, and only transient ones (rate
+limits, 5xx, timeouts, dropped connections) are retried.
+"""
+
+import asyncio
+import random
+import time
+from collections import Counter, deque
+from contextlib import AsyncExitStack, nullcontext
+from email.utils import parsedate_to_datetime
+from typing import AsyncContextManager, Awaitable, Callable, Optional, TypeVar
+
+import httpx
+import numpy as np
+
+from clockcheck.utils import timing
+from clockcheck.utils.config import ResilienceConfig
+
+R = TypeVar("R")
+
+RETRYABLE = ["rate_limit", "server", "timeout", "connection"]
+
+
+def _status(exc: BaseException) -> Optional[int]:
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def classify(exc: BaseException) -> Optional[str]:
+    """Which of `RETRYABLE` a failure is, or None if retrying won't help.
+
+    Understands exceptions from the OpenAI client, httpx and asyncio.
+    """
+    if isinstance(exc, TimeoutError) or "Timeout" in type(exc).__name__:
+        return "timeout"
+    status = _status(exc)
+    if status == 429:
+        return "rate_limit"
+    if status == 408:
+        return "timeout"
+    if status is not None:
+        return "server" if status >= 500 else None
+    if isinstance(exc, (httpx.TransportError, ConnectionError)):
+        return "connection"
+    if "Connection" in type(exc).__name__:
+        return "connection"
+    return None
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds the server asked us to wait, from 'Retry-After(-Ms)' headers."""
+    headers = getattr(getattr(exc, "response", None), "headers", None)
+    if not headers:
+        return None
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if value is None:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            # An HTTP date
+            return parsedate_to_datetime(value).timestamp() - time.time()
+    except (TypeError, ValueError):
+        return None
+
+
+class Resilience:
+    """Retry, timeout and hedging policy for one backend, with counters.
+
+    With `hedge_percentile` set, a request still running after that
+    percentile of this backend's recent latencies gets a duplicate; the
+    first of the two to succeed is used and the other is cancelled. Both
+    TTS and ASR requests are idempotent, so the duplicate is safe. It skips
+    the limiter, which the original may hold (with one request at a time,
+    a duplicate waiting for a slot could never start first); instead at
+    most `hedge_max_in_flight` duplicates run at once.
+    """
+
+    def __init__(self, config: Optional[ResilienceConfig] = None):
+        self.config = config or ResilienceConfig()
+        if self.config.max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1.")
+        self.requests = 0
+        self.retries: Counter = Counter()
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.failures = 0
+        self._latencies: deque = deque(maxlen=256)
+        self._hedge_slots = asyncio.Semaphore(self.config.hedge_max_in_flight)
+
+    def hedge_delay(self) -> Optional[float]:
+        """How long to wait before hedging, or None if hedging is off."""
+        percentile = self.config.hedge_percentile
+        if percentile is None or len(self._latencies) < self.config.hedge_min_samples:
+            return None
+        return float(np.percentile(self._latencies, percentile))
+
+    def backoff(self, attempt: int, exc: BaseException) -> float:
+        """Delay before retry number `attempt`, honoring Retry-After."""
+        requested = retry_after(exc)
+        if requested is not None and requested >= 0:
+            return min(requested, self.config.max_backoff_s)
+        # Exponential backoff with full jitter
+        ceiling = self.config.backoff_s * 2 ** (attempt - 1)
+        return random.uniform(0, min(ceiling, self.config.max_backoff_s))
+
+    async def call(
+        self,
+        fn: Callable[[], Awaitable[R]],
+        limiter=None,
+        slot: Optional[Callable[[], AsyncContextManager]] = None,
+    ) -> R:
+        """Run `fn` under `limiter`, retrying transient failures.
+
+        Args:
+            fn: Makes one request, e.g. `lambda: model.generate(text)`.
+            limiter: Held around every attempt; anything usable with
+                `async with`.
+            slot: Entered around every attempt, hedges included, after the
+                limiter, e.g. `Transcriber.slot`. Like the limiter, waiting
+                for it counts as queue time, not request time.
+
+        Raises:
+            The last failure, once it isn't retryable or attempts run out.
+        """
+        self.requests += 1
+        for attempt in range(1, self.config.max_attempts + 1):
+            try:
+                return await self._attempt(fn, limiter, slot)
+            except Exception as exc:
+                kind = classify(exc)
+                if kind is None or attempt == self.config.max_attempts:
+                    self.failures += 1
+                    raise
+                self.retries[kind] += 1
+                await asyncio.sleep(self.backoff(attempt, exc))
+        raise AssertionError("unreachable")
+
+    async def _attempt(self, fn: Callable[[], Awaitable[R]], limiter, slot) -> R:
+        delay = self.hedge_delay()
+        if delay is None:
+            return await self._send(fn, limiter, slot)
+
+        # The delay counts from when the request is sent, not queued
+        sent = asyncio.Event()
+        primary = asyncio.create_task(self._send(fn, limiter, slot, sent=sent))
+        waiting = asyncio.create_task(sent.wait())
+        try:
+            await asyncio.wait({primary, waiting}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            waiting.cancel()
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+        if self._hedge_slots.locked():
+            return await primary
+
+        self.hedges += 1
+        timer = timing.current()
+        if timer is not None:
+            timer.hedged = True
+        async with self._hedge_slots:
+            hedge = asyncio.create_task(self._send(fn, None, slot, track=False))
+            pending = {primary, hedge}
+            errors = []
+            try:
+                while pending:
+                    done, pending = await asyncio.wait(
+                        pending, return_when=asyncio.FIRST_COMPLETED
+                    )
+                    for task in done:
+                        if task.exception() is None:
+                            if task is hedge:
+                                self.hedge_wins += 1
+                            return task.result()
+                        errors.append(task.exception())
+                raise errors[0]
+            finally:
+                for task in (primary, hedge):
+                    task.cancel()
+
+    async def _send(
+        self,
+        fn: Callable[[], Awaitable[R]],
+        limiter,
+        slot: Optional[Callable[[], AsyncContextManager]] = None,
+        track: bool = True,
+        sent: Optional[asyncio.Event] = None,
+    ) -> R:
+        # A hedge runs in its own task; untracked, it doesn't add its
+        # phases to the row's timings on top of the primary's
+        with nullcontext() if track else timing.untracked():
+            timer = timing.current()
+            if timer is not None:
+                timer.attempts += 1
+            async with AsyncExitStack() as stack:
+                with timing.phase("queue"):
+                    await stack.enter_async_context(limiter or nullcontext())
+                    if slot is not None:
+                        await stack.enter_async_context(slot())
+                start = time.perf_counter()
+                if sent is not None:
+                    sent.set()
+                with timing.phase("request"):
+                    async with asyncio.timeout(self.config.timeout_s):
+                        result = await fn()
+            self._latencies.append(time.perf_counter() - start)
+            return result
+
+    def report(self, label: str) -> str:
+        """One-line summary of retries, hedges and failures for end-of-run logging."""
+        retried = ", ".join(f"{k} {n}" for k, n in self.retries.items() if n)
+        line = (
+            f"{label} requests: {self.requests}, retries: {sum(self.retries.values())}"
+        )
+        if retried:
+            line += f" ({retried})"
+        if self.config.hedge_percentile is not None:
+            line += f", hedged: {self.hedges} (hedge won {self.hedge_wins})"
+        return line + f", failed: {self.failures}"
+
+
+__all__ = ["RETRYABLE", "Resilience", "classify", "retry_after"]
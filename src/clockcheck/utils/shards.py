@@ -0,0 +1,203 @@
+import asyncio
+import glob
+import json
+import os
+from typing import TYPE_CHECKING, Iterator
+
+from clockcheck.utils.audio import AudioFormat, audio_feature, encode_audio
+from clockcheck.utils.executor import run_cpu
+
+if TYPE_CHECKING:
+    from datasets import Dataset
+
+MANIFEST_NAME = "manifest.jsonl"
+KEY_COLUMN = "row_id"
+
+
+def with_row_ids(ds: "Dataset") -> "Dataset":
+    """Add a stable 'row_id' column (the input row index) if missing.
+
+    Row ids are the keys recorded in shard manifests, so they must be
+    assigned before any stage runs.
+    """
+    if KEY_COLUMN in ds.column_names:
+        return ds
+    return ds.add_column(KEY_COLUMN, list(range(len(ds))))
+
+
+def shard_range(total: int, num_shards: int, shard_index: int) -> range:
+    """Contiguous, deterministic slice of `range(total)` for one shard.
+
+    Shard sizes differ by at most one row.
+    """
+    if not 0 <= shard_index < num_shards:
+        raise ValueError(f"shard_index must be in [0, {num_shards}), got {shard_index}")
+    base, extra = divmod(total, num_shards)
+    start = shard_index * base + min(shard_index, extra)
+    return range(start, start + base + (shard_index < extra))
+
+
+class ShardWriter:
+    """Crash-safe, resumable writer for per-row results.
+
+    Rows are buffered and flushed as Parquet shards of at most `shard_size`
+    rows. After each shard is atomically renamed into place, one line
+    naming the shard and its row keys is appended to `manifest.jsonl`.
+    Shards that are not in the manifest (e.g. from a crash mid-flush) are
+    ignored and removed on resume.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        shard_size: int = 256,
+        resume: bool = False,
+        audio_format: AudioFormat = "flac",
+    ):
+        """
+        Args:
+            path: Directory to write shards and the manifest into.
+            shard_size: Maximum number of rows held in memory before a flush.
+            resume: Continue from an existing manifest instead of starting
+                fresh.
+            audio_format: How waveforms in the 'audio' column are stored;
+                see `clockcheck.utils.audio.audio_feature`.
+
+        Raises:
+            FileExistsError: If `path` already holds results and `resume`
+                is False.
+        """
+        if shard_size <= 0:
+            raise ValueError("shard_size must be positive.")
+        self.path = path
+        self.shard_size = shard_size
+        self.audio_format = audio_format
+        self.completed: set = set()
+        self._shards: list[str] = []
+        self._buffer: list[dict] = []
+        self._flushing = asyncio.Lock()
+
+        manifest_path = os.path.join(path, MANIFEST_NAME)
+        if os.path.exists(manifest_path):
+            if not resume:
+                raise FileExistsError(
+                    f"{path} already contains results; pass --resume to continue "
+                    "the run or choose another output_dataset_path."
+                )
+            entries = []
+            with open(manifest_path) as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        break  # Torn final line from a crash mid-append
+            # Rewrite without the torn line so new entries append cleanly
+            with open(manifest_path + ".tmp", "w") as f:
+                f.writelines(json.dumps(entry) + "\n" for entry in entries)
+            os.replace(manifest_path + ".tmp", manifest_path)
+            for entry in entries:
+                self._shards.append(entry["shard"])
+                self.completed.update(entry["keys"])
+            print(
+                f"Resuming from {path}: {len(self.completed)} rows in {len(self._shards)} shards"
+            )
+
+        os.makedirs(path, exist_ok=True)
+        known = set(self._shards)
+        for orphan in glob.glob(os.path.join(path, "shard-*.parquet*")):
+            if os.path.basename(orphan) not in known:
+                os.remove(orphan)
+        self._manifest = open(manifest_path, "a")
+
+    def is_done(self, item: dict) -> bool:
+        """Whether `item` already has a result in a committed shard."""
+        return item[KEY_COLUMN] in self.completed
+
+    def pending(self, ds: "Dataset") -> tuple[Iterator[dict], int]:
+        """Lazily iterate the rows of `ds` that don't have a result yet.
+
+        Returns:
+            The row iterator and the number of rows it will yield.
+        """
+        remaining = sum(1 for key in ds[KEY_COLUMN] if key not in self.completed)
+        return (item for item in ds if not self.is_done(item)), remaining
+
+    async def write(self, row: dict) -> None:
+        """Buffer a finished row, flushing a shard once the buffer is full.
+
+        Raw waveforms are encoded to the storage format right away, off the
+        event loop, so the buffer only holds compact audio.
+        """
+        audio = row.get("audio")
+        if audio is not None and not isinstance(audio, dict):
+            encoded = await run_cpu(encode_audio, audio, self.audio_format)
+            row = {**row, "audio": encoded}
+        self._buffer.append(row)
+        if len(self._buffer) >= self.shard_size:
+            await self.flush(full_only=True)
+
+    async def flush(self, full_only: bool = False) -> None:
+        """Write buffered rows as new shards and record them in the manifest.
+
+        Shards are written in a worker thread, and rows that finish
+        meanwhile keep being buffered. Flushes run one at a time, so shards
+        and manifest lines stay in order, and each shard takes at most
+        `shard_size` rows.
+
+        Args:
+            full_only: Leave fewer than `shard_size` rows in the buffer
+                instead of writing them as a smaller shard.
+        """
+        async with self._flushing:
+            while len(self._buffer) >= (self.shard_size if full_only else 1):
+                rows = self._buffer[: self.shard_size]
+                self._buffer = self._buffer[self.shard_size :]
+                name = f"shard-{len(self._shards):05d}.parquet"
+                keys = await asyncio.to_thread(self._write_shard, name, rows)
+                self._shards.append(name)
+                self.completed.update(keys)
+
+    def _write_shard(self, name: str, rows: list[dict]) -> list:
+        import pyarrow.parquet as pq
+        from datasets import Dataset, Value
+        from datasets.table import table_cast
+
+        final_path = os.path.join(self.path, name)
+        tmp_path = final_path + ".tmp"
+        shard = Dataset.from_list(rows)
+        features = shard.features.copy()
+        for column, feature in features.items():
+            if column == "audio":
+                features[column] = audio_feature(self.audio_format)
+            elif isinstance(feature, Value) and feature.dtype == "null":
+                # e.g. a shard where every transcription failed; keep the
+                # schema consistent with the other shards
+                features[column] = Value("string")
+        pq.write_table(table_cast(shard.data.table, features.arrow_schema), tmp_path)
+        os.replace(tmp_path, final_path)
+
+        keys = [row[KEY_COLUMN] for row in rows]
+        self._manifest.write(json.dumps({"shard": name, "keys": keys}) + "\n")
+        self._manifest.flush()
+        os.fsync(self._manifest.fileno())
+        return keys
+
+    async def close(self) -> None:
+        """Flush any remaining rows and close the manifest."""
+        await self.flush()
+        self._manifest.close()
+
+    async def load(self) -> "Dataset":
+        """Load every committed shard as one memory-mapped Dataset."""
+        await self.close()
+        return await asyncio.to_thread(self.committed)
+
+    def committed(self) -> "Dataset":
+        """The rows in committed shards so far, without closing the writer."""
+        from datasets import Dataset
+
+        if not self._shards:
+            return Dataset.from_list([])
+        return Dataset.from_parquet(
+            [os.path.join(self.path, name) for name in self._shards]
+        )
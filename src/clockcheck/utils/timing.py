@@ -0,0 +1,225 @@
+import math
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Iterator, Optional
+
+import httpx
+
+if TYPE_CHECKING:
+    from datasets import Dataset
+
+PHASES = ["queue", "ttfb", "first_audio", "request", "decode", "encode"]
+"""
+Per-request phases, all in seconds:
+
+- queue: waiting for the rate limiter
+- ttfb: request sent to response headers received
+- first_audio: request sent to first audio bytes received (streaming TTS)
+- request: time in the backend call, excluding decode/encode
+- decode: decoding/resampling the response (TTS)
+- encode: resampling/encoding the upload, once per row before the first
+  attempt (ASR)
+"""
+
+_current: ContextVar[Optional["RequestTimer"]] = ContextVar(
+    "clockcheck_request_timer", default=None
+)
+
+
+class RequestTimer:
+    """Phase timings for one row's request.
+
+    Backends don't get a timer passed in. They use the module-level `phase`
+    helper and the httpx `event_hooks`, which find the timer for the current
+    task through a context variable, so instrumentation doesn't change the
+    `TTSModel` / `Transcriber` signatures.
+    """
+
+    def __init__(self):
+        self.phases: dict[str, float] = {}
+        self.backend: Optional[str] = None
+        self.attempts = 0
+        self.hedged = False
+        self._sent_at: Optional[float] = None
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def columns(self, prefix: str, audio_seconds: Optional[float] = None) -> dict:
+        """Timings as row columns, e.g. 'tts_queue_s'. Missing phases are NaN.
+
+        Also '<prefix>_attempts' (requests sent, including retries and
+        hedges; 0 for cache hits) and '<prefix>_hedged'.
+        """
+        phases = dict(self.phases)
+        # decode runs inside the backend call; report it separately
+        if "request" in phases:
+            phases["request"] -= phases.get("decode", 0.0)
+        columns = {f"{prefix}_{p}_s": phases.get(p, math.nan) for p in PHASES}
+        columns[f"{prefix}_backend"] = self.backend or ""
+        if audio_seconds:
+            columns[f"{prefix}_rtf"] = phases.get("request", math.nan) / audio_seconds
+        else:
+            columns[f"{prefix}_rtf"] = math.nan
+        columns[f"{prefix}_attempts"] = self.attempts
+        columns[f"{prefix}_hedged"] = self.hedged
+        return columns
+
+
+@contextmanager
+def track() -> Iterator[RequestTimer]:
+    """Start timing a row; backend helpers called inside record into it."""
+    timer = RequestTimer()
+    token = _current.set(timer)
+    try:
+        yield timer
+    finally:
+        _current.reset(token)
+
+
+def current() -> Optional[RequestTimer]:
+    """The timer of the row being processed by the current task, if any."""
+    return _current.get()
+
+
+@contextmanager
+def untracked() -> Iterator[None]:
+    """Stop recording into the current row's timer inside this block."""
+    token = _current.set(None)
+    try:
+        yield
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def phase(name: str) -> Iterator[None]:
+    """Time a phase of the current row's request, if one is being tracked."""
+    timer = _current.get()
+    if timer is None:
+        yield
+        return
+    with timer.phase(name):
+        yield
+
+
+def mark(name: str) -> None:
+    """Record the time since the current row's request was sent as `name`.
+
+    Only the first mark of each name counts.
+    """
+    timer = _current.get()
+    if timer is None or timer._sent_at is None or name in timer.phases:
+        return
+    timer.phases[name] = time.perf_counter() - timer._sent_at
+
+
+async def _on_request(request: httpx.Request) -> None:
+    timer = _current.get()
+    if timer is not None:
+        timer._sent_at = time.perf_counter()
+
+
+async def _on_response(response: httpx.Response) -> None:
+    # Runs once headers arrive, before the body is read. With retries the
+    # last attempt wins, which is the one whose response was used.
+    timer = _current.get()
+    if timer is None:
+        return
+    if timer._sent_at is not None:
+        timer.phases["ttfb"] = time.perf_counter() - timer._sent_at
+    url = response.request.url
+    timer.backend = f"{url.scheme}://{url.host}:{url.port or ''}".rstrip(":")
+
+
+def event_hooks() -> dict:
+    """httpx event hooks that record time to first byte and the backend URL."""
+    return {"request": [_on_request], "response": [_on_response]}
+
+
+def report(
+    ds: "Dataset",
+    prefixes: tuple[str, ...] = ("tts", "asr"),
+    group_by: Optional[str] = None,
+) -> dict:
+    """p50/p90/p99 of every phase, per stage and per backend.
+
+    Args:
+        ds: Dataset with timing columns written by `RequestTimer.columns`.
+        prefixes: Stages to report on.
+        group_by: Optional column, e.g. 'run', to split each backend by.
+            Groups are keyed '<value> @ <backend>'.
+
+    Returns:
+        {stage: {backend: {phase: {"p50": ..., "p90": ..., "p99": ...}}}},
+        where each backend also has 'rows' and, if recorded, 'retries'
+        and 'hedged' counts.
+    """
+    summary: dict = {}
+    for prefix in prefixes:
+        value_columns = [
+            c
+            for c in [f"{prefix}_{p}_s" for p in PHASES] + [f"{prefix}_rtf"]
+            if c in ds.column_names
+        ]
+        backend_column = f"{prefix}_backend"
+        if not value_columns or backend_column not in ds.column_names:
+            continue
+        extra = [group_by] if group_by in ds.column_names else []
+        counts = [
+            c
+            for c in (f"{prefix}_attempts", f"{prefix}_hedged")
+            if c in ds.column_names
+        ]
+        df = ds.select_columns(
+            value_columns + [backend_column] + extra + counts
+        ).to_pandas()
+        df[backend_column] = df[backend_column].replace("", "(none)")
+        if extra:
+            df[backend_column] = df[group_by].astype(str) + " @ " + df[backend_column]
+        stage: dict = {}
+        for backend, group in df.groupby(backend_column):
+            quantiles = group[value_columns].quantile([0.5, 0.9, 0.99])
+            stage[backend] = {
+                column.removeprefix(f"{prefix}_"): {
+                    f"p{round(q * 100)}": float(quantiles.loc[q, column])
+                    for q in (0.5, 0.9, 0.99)
+                }
+                for column in value_columns
+                if group[column].notna().any()
+            }
+            stage[backend]["rows"] = len(group)
+            if f"{prefix}_attempts" in counts:
+                retries = (group[f"{prefix}_attempts"] - 1).clip(lower=0)
+                stage[backend]["retries"] = int(retries.sum())
+            if f"{prefix}_hedged" in counts:
+                stage[backend]["hedged"] = int(group[f"{prefix}_hedged"].sum())
+        summary[prefix] = stage
+    return summary
+
+
+def format_report(summary: dict) -> str:
+    """Render `report` output as a table for the console."""
+    lines = []
+    for stage, backends in summary.items():
+        for backend, phases in backends.items():
+            counts = f"{phases['rows']} rows"
+            if phases.get("retries") or phases.get("hedged"):
+                counts += f", {phases.get('retries', 0)} retries"
+                counts += f", {phases.get('hedged', 0)} hedged"
+            lines.append(f"{stage.upper()} {backend} ({counts})")
+            for name, q in phases.items():
+                if not isinstance(q, dict):
+                    continue
+                unit = "" if name == "rtf" else "s"
+                lines.append(
+                    f"  {name:<10} p50 {q['p50']:.3f}{unit}  "
+                    f"p90 {q['p90']:.3f}{unit}  p99 {q['p99']:.3f}{unit}"
+                )
+    return "\n".join(lines)
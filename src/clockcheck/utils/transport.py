@@ -0,0 +1,61 @@
+"""HTTP clients shared by the transcribers.
+
+Every transcriber built with the same transport settings gets the same
+`httpx.AsyncClient`, and so the same connection pool. Connections stay open
+between requests instead of being set up for each one. With `http2`,
+requests to one server are multiplexed over a few connections.
+"""
+
+import importlib.util
+from typing import Dict
+
+import httpx
+
+from clockcheck.utils import timing
+from clockcheck.utils.config import TransportConfig
+
+_clients: Dict[str, httpx.AsyncClient] = {}
+
+
+def make_client(config: TransportConfig, max_concurrency: int) -> httpx.AsyncClient:
+    """A new client with `config`'s pool limits, timeouts and timing hooks.
+
+    Args:
+        config: Transport settings.
+        max_concurrency: The backend's in-flight request bound; the pool
+            defaults to this many connections.
+
+    Raises:
+        ValueError: If HTTP/2 is asked for but h2 isn't installed.
+    """
+    if config.http2 and importlib.util.find_spec("h2") is None:
+        raise ValueError("transport.http2 needs the h2 package; install httpx[http2].")
+    max_connections = config.max_connections or max_concurrency
+    return httpx.AsyncClient(
+        limits=httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=config.max_keepalive_connections
+            or max_connections,
+            keepalive_expiry=config.keepalive_expiry_s,
+        ),
+        timeout=httpx.Timeout(config.read_timeout_s, connect=config.connect_timeout_s),
+        http2=config.http2,
+        # Matches the OpenAI client's own default
+        follow_redirects=True,
+        event_hooks=timing.event_hooks(),
+    )
+
+
+def shared_client(config: TransportConfig, max_concurrency: int) -> httpx.AsyncClient:
+    """The process-wide client for these settings, made on first use.
+
+    Like any `httpx.AsyncClient`, it must only be used from one event loop.
+    """
+    key = f"{config.model_dump_json()}:{max_concurrency}"
+    client = _clients.get(key)
+    if client is None or client.is_closed:
+        client = _clients[key] = make_client(config, max_concurrency)
+    return client
+
+
+__all__ = ["make_client", "shared_client"]
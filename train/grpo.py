@@ -1,15 +1,27 @@
+import time
+from typing import Optional
+
 from trl.trainer import GRPOTrainer
-from accelerate.utils import is_peft_model
+from accelerate.utils import gather, is_peft_model
+import numpy as np
 import torch
 
+from clockcheck.trainers import RewardService
+
 
 class AudioGRPOTrainer(GRPOTrainer):
-    def __init__(self, model, *args, **kwargs):
+    def __init__(
+        self, model, *args, reward_service: Optional[RewardService] = None, **kwargs
+    ):
         # force vllm off, kill reference‑model allocation
         kwargs.setdefault("args", None)  # let parent build a GRPOConfig
+        if reward_service is not None:
+            # rewards come from the service, not reward_funcs
+            kwargs.setdefault("reward_funcs", [])
         super().__init__(model=model, *args, **kwargs)
         self.use_vllm = False  # safety: parent can’t sneak it on
         self.ref_model = None  # we’ll always .disable_adapter()
+        self.reward_service = reward_service
 
         # no tokenizer; use a trivial pass‑through
         class _DummyTok:
@@ -35,6 +47,14 @@ class AudioGRPOTrainer(GRPOTrainer):
            …or whatever API you expose.
         3. We return the exact same dict keys the parent expects, but built
            from audio tokens.
+
+        With a `reward_service`, the completions are decoded with
+        `self.model.decode_audio(...)` and scored by ClockCheck: each input
+        must carry its prompt row ('hour', 'minute', 'text' / 'ground_truth').
+        Scoring overlaps the reference log-prob pass of the same step, not
+        the next step's generation: this step's policy update needs this
+        step's rewards, and using the previous batch's instead would make
+        the update off-policy.
         """
         device = self.accelerator.device
         prompts = [x["prompt"].to(device) for x in inputs]  # already tensors
@@ -52,11 +72,74 @@ class AudioGRPOTrainer(GRPOTrainer):
             top_p=self.top_p,
         )
 
-        # advantages & rewards identical; fall back to parent helper
-        fake_inputs = [{"prompt": p} for p in prompts]  # minimal shim
-        for d, c in zip(fake_inputs, completion_ids):
-            d["completion_ids"] = c
-        return super()._generate_and_score_completions(fake_inputs)
+        if self.reward_service is None:
+            # advantages & rewards identical; fall back to parent helper
+            fake_inputs = [{"prompt": p} for p in prompts]  # minimal shim
+            for d, c in zip(fake_inputs, completion_ids):
+                d["completion_ids"] = c
+            return super()._generate_and_score_completions(fake_inputs)
+
+        # >>> YOUR OWN CODEC DECODER <<< one 1-D float waveform per completion
+        waveforms = self.model.decode_audio(completion_ids, completion_mask)
+        # ClockCheck transcribes and grades on its own thread while the
+        # reference log-probs are computed below
+        pending = self.reward_service.submit(
+            [w.detach().float().cpu().numpy() for w in waveforms],
+            [{k: v for k, v in x.items() if k != "prompt"} for x in inputs],
+        )
+
+        ref_per_token_logps = None
+        if self.beta != 0.0 and is_peft_model(self.model):
+            input_ids = torch.cat([prompt_ids, completion_ids], dim=1)
+            attention_mask = torch.cat([prompt_mask, completion_mask.int()], dim=1)
+            with self.model.disable_adapter():
+                ref_per_token_logps = self._get_per_token_logps(
+                    self.model, input_ids, attention_mask, completion_ids.size(1)
+                )
+
+        waited = time.perf_counter()
+        scored = pending.result()
+        wait_s = time.perf_counter() - waited
+
+        # Group-relative advantages. A prompt's generations may be split
+        # across processes, so normalize over the gathered batch as trl does
+        # and keep this process's slice
+        rewards = torch.tensor(scored.rewards, dtype=torch.float32, device=device)
+        all_rewards = gather(rewards)
+        if all_rewards.numel() % self.num_generations:
+            raise ValueError(
+                f"Got {all_rewards.numel()} completions across processes, not a "
+                f"multiple of num_generations={self.num_generations}."
+            )
+        grouped = all_rewards.view(-1, self.num_generations)
+        mean = grouped.mean(dim=1).repeat_interleave(self.num_generations)
+        std = grouped.std(dim=1).repeat_interleave(self.num_generations)
+        start = self.accelerator.process_index * len(rewards)
+        advantages = (all_rewards - mean) / (std + 1e-4)
+        advantages = advantages[start : start + len(rewards)]
+
+        mode = "train" if self.model.training else "eval"
+        metrics = self._metrics[mode]
+        metrics["reward"].append(all_rewards.mean().item())
+        metrics["reward_std"].append(std.mean().item())
+        metrics["clockcheck/time_accuracy"].append(
+            float(np.mean(scored.grades["time_correct"]))
+        )
+        metrics["clockcheck/mean_wer"].append(float(np.mean(scored.grades["wer"])))
+        # latency: submit to rewards ready; wait: how long training blocked
+        metrics["clockcheck/reward_latency_s"].append(scored.latency_s)
+        metrics["clockcheck/reward_wait_s"].append(wait_s)
+
+        return {
+            "prompt_ids": prompt_ids,
+            "prompt_mask": prompt_mask,
+            "completion_ids": completion_ids,
+            "completion_mask": completion_mask,
+            # single policy update per generation, as with num_iterations=1
+            "old_per_token_logps": None,
+            "ref_per_token_logps": ref_per_token_logps,
+            "advantages": advantages,
+        }
 
     # ------- log‑prob computation ------- #
     def _get_per_token_logps(